@@ -0,0 +1,139 @@
+import os
+import sys
+import glob
+import json
+import argparse
+import contextlib
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import nrbf
+import decode_markers
+import extract_markers
+
+DEFAULT_PATTERN = "*.minimapdata"
+
+
+def collect_input_files(inputs, pattern=DEFAULT_PATTERN):
+    """Expand directories (recursively, using `pattern`) and globs into a sorted file list."""
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            files.update(glob.glob(os.path.join(item, "**", pattern), recursive=True))
+        elif os.path.isfile(item):
+            files.add(item)
+        else:
+            files.update(f for f in glob.glob(item, recursive=True) if os.path.isfile(f))
+    return sorted(files)
+
+
+def extract_file_markers(filepath):
+    """Worker: return (filepath, method, markers, error) for one marker file.
+
+    Decodes the NRBF object graph first; if the file does not parse (or its markers
+    cannot be read from it), falls back to the GUID-linked float-triplet scan, which
+    recovers GUIDs and coordinates only. Any failure is returned as the file's
+    error, so one bad file never stops the batch.
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            root = nrbf.load(f)
+        markers = [decode_markers.marker_record(m) for m in decode_markers.iter_marker_objects(root)]
+        return filepath, "nrbf", markers, None
+    except OSError as e:
+        return filepath, None, [], str(e)
+    except Exception as e:
+        decode_error = str(e) if isinstance(e, nrbf.NrbfError) else f"{type(e).__name__}: {e}"
+
+    try:
+        # Silence the scanner's progress output, the parent process reports per file
+        with extract_markers.map_file(filepath) as data, contextlib.redirect_stdout(io.StringIO()):
+            positions = extract_markers.extract_float_positions(data)
+    except Exception as e:
+        return filepath, None, [], f"{decode_error}; float-scan failed: {e}"
+    markers = [{
+        "guid": p['guid'],
+        "name": None,
+        "description": None,
+        "type": None,
+        "x": decode_markers.format_single(p['x']),
+        "y": decode_markers.format_single(p['y']),
+        "z": decode_markers.format_single(p['z']),
+    } for p in positions]
+    return filepath, f"float-scan ({decode_error})", markers, None
+
+
+def marker_key(marker):
+    """Identity of a marker across contributor files: GUID plus coordinates."""
+    return (marker['guid'], marker['x'], marker['y'], marker['z'])
+
+
+def batch_extract(files, out, workers=None, dedupe=True):
+    """Extract markers from `files` in a process pool and stream them to `out` as JSON lines.
+
+    Results are streamed in input order (a file is written once it and every file
+    before it have finished), so the output is the same on every run; duplicates
+    (same GUID and coordinates) seen in an earlier file are dropped via a hash set
+    of keys, the earliest file owning each marker.
+    Returns (written, duplicates, failed_files).
+    """
+    seen = set()
+    written = 0
+    duplicates = 0
+    failed = []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for filepath, method, markers, error in executor.map(extract_file_markers, files):
+            if error:
+                print(f"  - {filepath}: {error}", file=sys.stderr)
+                failed.append(filepath)
+                continue
+
+            file_written = 0
+            for marker in markers:
+                if dedupe:
+                    key = marker_key(marker)
+                    if key in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(key)
+                out.write(json.dumps({"source": filepath, **marker}, ensure_ascii=False) + "\n")
+                file_written += 1
+            written += file_written
+            print(f"  + {filepath}: {len(markers)} markers via {method}, {file_written} new", file=sys.stderr)
+
+    return written, duplicates, failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Extract markers from many .minimapdata files in parallel and write them as JSON lines.")
+    parser.add_argument("inputs", nargs="+", help="Marker files, directories (searched recursively) or glob patterns.")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL path, or '-' for stdout. Default: %(default)s")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help="File pattern used inside directories. Default: %(default)s")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes. Default: CPU count")
+    parser.add_argument("--no-dedupe", action="store_true", help="Keep markers repeated across files.")
+    args = parser.parse_args()
+
+    files = collect_input_files(args.inputs, args.pattern)
+    if not files:
+        print("Error: No input files found.", file=sys.stderr)
+        sys.exit(1)
+    print(f"Processing {len(files)} marker files...", file=sys.stderr)
+
+    start = time.perf_counter()
+    if args.output == "-":
+        written, duplicates, failed = batch_extract(files, sys.stdout, args.workers, not args.no_dedupe)
+    else:
+        output_dir = os.path.dirname(args.output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as out:
+            written, duplicates, failed = batch_extract(files, out, args.workers, not args.no_dedupe)
+
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {written} markers ({duplicates} duplicates skipped, {len(failed)} files failed) "
+          f"in {elapsed:.2f}s", file=sys.stderr)
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import struct
+import argparse
+import time
+
+import nrbf
+
+# CustomMarkerTypes enum of the game (see tools/csharp/markers/MinimapMarkerInfo.cs)
+CUSTOM_MARKER_TYPES = [
+    "Unknown", "Ore_Silver", "Wood", "NPC", "POI", "Enemy", "Ore_Platinum", "Ore_T4", "Ore_Bronze",
+    "Bear", "Ore_Coal", "Ore_Iron", "Ore_Copper", "Entrance", "Tree", "Mob", "Herb", "Death",
+]
+
+# Every reference-type object gets a "$id" in the C# dump (ReferenceHandler.Preserve);
+# the root collection is "1" and markers are numbered from "2" in list order.
+ROOT_REF_ID = 1
+
+
+def format_single(value):
+    """Format a float32 the way System.Text.Json does: shortest round-trip, no '.0'."""
+    if value is None:
+        return None
+    if value == int(value):
+        return int(value)
+    packed = struct.pack('<f', value)
+    for precision in range(1, 10):
+        text = f"{value:.{precision}g}"
+        if struct.pack('<f', float(text)) == packed:
+            return float(text)
+    return value
+
+
+def iter_marker_objects(root):
+    """Yield the marker records from the deserialized root collection."""
+    if isinstance(root, nrbf.NrbfArray):
+        items = root.items
+    elif isinstance(root, nrbf.NrbfObject) and root.class_name.startswith('System.Collections.Generic.List`1'):
+        # List<T> serializes its backing array plus the used size
+        backing = root.get('_items')
+        size = root.get('_size', 0)
+        items = backing.items[:size] if isinstance(backing, nrbf.NrbfArray) else []
+    elif isinstance(root, nrbf.NrbfObject) and root.class_name == 'System.Collections.ArrayList':
+        backing = root.get('_items')
+        size = root.get('_size', 0)
+        items = backing.items[:size] if isinstance(backing, nrbf.NrbfArray) else []
+    else:
+        raise nrbf.NrbfError(f"Root object is not a marker collection: {root!r}")
+
+    for item in items:
+        if isinstance(item, nrbf.NrbfObject):
+            yield item
+
+
+def marker_position(marker):
+    """Return (x, y, z) floats of the marker's RPGLibrary.Position member."""
+    position = marker.get('position')
+    if not isinstance(position, nrbf.NrbfObject):
+        return (0.0, 0.0, 0.0)
+    return (position.get('X', 0.0), position.get('Y', 0.0), position.get('Z', 0.0))
+
+
+def marker_type(marker):
+    """Return the integer CustomMarkerTypes value of a marker (0 = Unknown)."""
+    value = marker.get('type')
+    if isinstance(value, nrbf.NrbfObject):
+        return value.get('value__', 0)
+    return value if isinstance(value, int) else 0
+
+
+def marker_type_name(marker):
+    """Return the CustomMarkerTypes name of a marker, or the raw number if out of range."""
+    value = marker_type(marker)
+    if 0 <= value < len(CUSTOM_MARKER_TYPES):
+        return CUSTOM_MARKER_TYPES[value]
+    return str(value)
+
+
+def marker_record(marker):
+    """Flatten a decoded marker into a plain dict (guid, name, description, type, x, y, z)."""
+    x, y, z = (format_single(v) for v in marker_position(marker))
+    return {
+        "guid": marker.get('guid'),
+        "name": marker.get('name'),
+        "description": marker.get('_description'),
+        "type": marker_type_name(marker),
+        "x": x,
+        "y": y,
+        "z": z,
+    }
+
+
+def marker_to_dump_entry(marker, ref_id):
+    """Build one entry of markers_markers_full_dump.json from a decoded marker."""
+    x, y, z = (format_single(v) for v in marker_position(marker))
+    vector = {"x": x, "y": y, "z": z}
+    name = marker.get('name')
+    description = marker.get('_description')
+    return {
+        "$id": str(ref_id),
+        "MapName": None, # [NonSerialized] in the game, always null after deserialization
+        "Position": {
+            "WorldPosition": dict(vector),
+            "ToVector": dict(vector),
+            "x": x,
+            "y": y,
+            "z": z,
+            "X": x,
+            "Y": y,
+            "Z": z,
+        },
+        "Guid": marker.get('guid'),
+        "GetTitle": name if name is not None else "No Title",
+        "GetDescription": description if description is not None else "",
+        "IsPersistant": bool(marker.get('isPersistant', False)),
+        "GetIcon": None,
+        "GetBackgroundColor": {"r": 0, "g": 0, "b": 0, "a": 0},
+    }
+
+
+def write_dump(markers, out):
+    """Stream the dump JSON to `out`, one marker entry at a time. Returns the marker count."""
+    out.write('{\n  "$id": "%d",\n  "$values": [' % ROOT_REF_ID)
+    count = 0
+    for count, marker in enumerate(markers, start=1):
+        entry = json.dumps(marker_to_dump_entry(marker, ROOT_REF_ID + count), indent=2)
+        out.write((',' if count > 1 else '') + '\n    ' + entry.replace('\n', '\n    '))
+    out.write('\n  ]\n}' if count else ']\n}')
+    return count
+
+
+def decode_markers_file(input_path, output_path):
+    """Decode a markers.minimapdata file and write the full marker dump JSON."""
+    with open(input_path, 'rb') as f:
+        root = nrbf.load(f)
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as out:
+        return write_dump(iter_marker_objects(root), out)
+
+
+def compare_dumps(generated_path, reference_path):
+    """Compare two dump files entry by entry. Returns a list of difference descriptions."""
+    with open(generated_path, 'r', encoding='utf-8') as f:
+        generated = json.load(f).get('$values', [])
+    with open(reference_path, 'r', encoding='utf-8') as f:
+        reference = json.load(f).get('$values', [])
+
+    differences = []
+    if len(generated) != len(reference):
+        differences.append(f"marker count {len(generated)} != {len(reference)}")
+    for index, (ours, theirs) in enumerate(zip(generated, reference)):
+        for key in sorted(set(ours) | set(theirs)):
+            if ours.get(key) != theirs.get(key):
+                differences.append(f"marker {index} ({theirs.get('Guid')}): '{key}' {ours.get(key)!r} != {theirs.get(key)!r}")
+    return differences
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Decode a BinaryFormatter markers.minimapdata file into markers_markers_full_dump.json.")
+    parser.add_argument("input_file", help="Path to the markers.minimapdata file.")
+    parser.add_argument("--output", help="Output JSON path. Default: <input>_markers_full_dump.json next to the input.")
+    parser.add_argument("--compare", metavar="DUMP_JSON",
+                        help="Cross-check the result against an existing dump (e.g. from the C# tool).")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.splitext(args.input_file)[0] + "_markers_full_dump.json"
+
+    start = time.perf_counter()
+    try:
+        count = decode_markers_file(args.input_file, output_path)
+    except FileNotFoundError:
+        print(f"Error: Input file not found: {args.input_file}")
+        sys.exit(1)
+    except nrbf.NrbfError as e:
+        print(f"Error: Could not decode {args.input_file}: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    print(f"Decoded {count} markers from {args.input_file} in {elapsed * 1000:.1f} ms")
+    print(f"Full marker dump written to {output_path}")
+
+    if args.compare:
+        differences = compare_dumps(output_path, args.compare)
+        if differences:
+            print(f"Cross-check against {args.compare} found {len(differences)} differences:")
+            for difference in differences[:20]:
+                print(f"  - {difference}")
+            sys.exit(1)
+        print(f"Cross-check against {args.compare}: identical marker data.")
@@ -1,27 +1,46 @@
 import os
+import sys
 import struct
 import json
 import re
 from collections import defaultdict
 import uuid
 import binascii
-import bisect
-
-def extract_positions(data, start_pos=0, max_scan=None):
+import contextlib
+import mmap
+from array import array
+import argparse
+import time
+import numpy as np
+
+from guid_index import index_guids, default_cache_dir, HYPHENATED_LENGTH as GUID_LENGTH
+
+# Define known markers from debug-markers.txt
+KNOWN_MARKERS_COORDS = {
+    # (x, y, z): "Expected Name"
+    (1653, 2869, 1) : "DEBUG - M1",
+    (1648, 2869, 1) : "DEBUG - M2",
+    (1636, 2869, 1) : "DEBUG - M3",
+    (1653, 2862, 1) : "DEBUG - M4", # Assuming Z=1 based on others
+    # Add others if needed
+}
+
+def extract_positions(data, start_pos=0, max_scan=None, guids=None):
     """Extract Position16 triplets only if they likely follow a GUID string + 0x01 marker."""
     print("Attempting to extract positions by looking after GUIDs...") # DEBUG
     if max_scan is None:
         max_scan = len(data)
     else:
         max_scan = min(max_scan, len(data))
+    if guids is None:
+        guids = index_guids(data)
 
     positions = []
-    # Regex for standard GUID format $xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx
-    # Need to account for potential length prefix byte before the '$'
-    guid_pattern = re.compile(rb"(.)\$([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})")
-
-    for match in guid_pattern.finditer(data):
-        guid_end_offset = match.end(2) # Offset after the 36 chars of the GUID
+    # Standard GUID format $xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx, with a length prefix byte before the '$'
+    for guid_start in guids.hyphenated.tolist():
+        if guid_start < 2 or data[guid_start - 1] != 0x24 or data[guid_start - 2] == 0x0a: # '$', prefix byte
+            continue
+        guid_end_offset = guid_start + GUID_LENGTH # Offset after the 36 chars of the GUID
         potential_marker_offset = guid_end_offset
 
         # Check if the byte immediately after the GUID is 0x01
@@ -39,13 +58,13 @@ def extract_positions(data, start_pos=0, max_scan=None):
                     if 0 <= x < 8000 and 0 <= y < 8000 and -50 <= z < 50:
                         positions.append({
                             'position_offset': pos_start_offset, # Store offset where Position16 *starts*
-                            'guid_offset': match.start(2) -1, # Offset where GUID string starts
-                            'guid': match.group(2).decode('ascii'),
+                            'guid_offset': guid_start - 1, # Offset where GUID string starts
+                            'guid': guids.guid_at(guid_start),
                             'x': x,
                             'y': y,
                             'z': z,
                         })
-                        # print(f"Found potential Position16 at {pos_start_offset} after GUID at {match.start(2)-1}: ({x},{y},{z})") # DEBUG
+                        # print(f"Found potential Position16 at {pos_start_offset} after GUID at {guid_start - 1}: ({x},{y},{z})") # DEBUG
                     # else: # DEBUG filtering
                         # print(f"Filtered Position16 at {pos_start_offset} due to range: ({x},{y},{z})")
 
@@ -58,9 +77,9 @@ def extract_positions(data, start_pos=0, max_scan=None):
                     pass
         # else: # DEBUG: No 0x01 marker found
             # if potential_marker_offset < len(data):
-                # print(f"Byte after GUID at {match.end(2)-1} is not 0x01, but {data[potential_marker_offset]:02x}")
+                # print(f"Byte after GUID at {guid_end_offset - 1} is not 0x01, but {data[potential_marker_offset]:02x}")
             # else:
-                # print(f"No data after GUID at {match.end(2)-1}")
+                # print(f"No data after GUID at {guid_end_offset - 1}")
 
     # Sort by the start offset of the Position16 data
     positions.sort(key=lambda p: p['position_offset'])
@@ -78,70 +97,155 @@ def extract_positions(data, start_pos=0, max_scan=None):
 
     return final_positions
 
+MAX_GUID_TO_POSITION_GAP = 128 # NRBF record header bytes between a marker's GUID and its Position
+
+def scan_float_triplets(data, max_xy=8000, min_z=-50, max_z=50):
+    """Find plausible RPGLibrary.Position payloads (three <f4 with integer world coords).
+
+    Views the buffer as float32 at each of the four byte alignments and filters every
+    (X, Y, Z) window vectorially. Returns (offsets, xyz) sorted by offset, where xyz is
+    an (n, 3) float32 array.
+    """
+    all_offsets = []
+    all_xyz = []
+    for align in range(4):
+        count = (len(data) - align) // 4
+        if count < 3:
+            continue
+        floats = np.frombuffer(data, dtype='<f4', count=count, offset=align)
+        x, y, z = floats[:-2], floats[1:-1], floats[2:]
+        with np.errstate(invalid='ignore'):
+            mask = (
+                (x >= 0) & (x < max_xy) & (y >= 0) & (y < max_xy) & (z >= min_z) & (z < max_z)
+                & (x == np.round(x)) & (y == np.round(y)) & (z == np.round(z))
+                & ((x != 0) | (y != 0)) # All-zero padding is not a position
+            )
+        k = np.flatnonzero(mask)
+        all_offsets.append(align + 4 * k)
+        all_xyz.append(np.stack([x[k], y[k], z[k]], axis=1))
+
+    if not all_offsets:
+        return np.empty(0, dtype=np.int64), np.empty((0, 3), dtype=np.float32)
+    offsets = np.concatenate(all_offsets)
+    xyz = np.concatenate(all_xyz)
+    order = np.argsort(offsets, kind='stable')
+    return offsets[order], xyz[order]
+
+def extract_float_positions(data, max_gap=MAX_GUID_TO_POSITION_GAP, guids=None):
+    """Extract marker positions as <fff triplets linked to the nearest preceding GUID.
+
+    GUID start offsets form a sorted index; every float hit is linked with a single
+    searchsorted call, and each GUID keeps the first hit within `max_gap` bytes after it.
+    """
+    print("Attempting to extract <fff positions linked to GUIDs...") # DEBUG
+    guid_offsets = (guids if guids is not None else index_guids(data)).hyphenated
+    offsets, xyz = scan_float_triplets(data)
+    if len(guid_offsets) == 0 or len(offsets) == 0:
+        return []
+
+    guid_idx = np.searchsorted(guid_offsets, offsets, side='right') - 1
+    gap = offsets - (guid_offsets[np.maximum(guid_idx, 0)] + GUID_LENGTH)
+    linked = (guid_idx >= 0) & (gap >= 0) & (gap <= max_gap)
+    # Hits are in offset order, so the first hit per GUID is the closest one
+    hit_idx = np.flatnonzero(linked)
+    _, first = np.unique(guid_idx[hit_idx], return_index=True)
+    hit_idx = hit_idx[first]
+
+    positions = []
+    for i in hit_idx.tolist():
+        guid_offset = int(guid_offsets[guid_idx[i]])
+        x, y, z = (int(v) for v in xyz[i])
+        positions.append({
+            'position_offset': int(offsets[i]),
+            'guid_offset': guid_offset,
+            'guid': data[guid_offset:guid_offset + GUID_LENGTH].decode('ascii'),
+            'x': x,
+            'y': y,
+            'z': z,
+        })
+    print(f"Found {len(positions)} GUID-linked <fff positions.") # DEBUG
+    return positions
+
+PRINTABLE_RUN_PATTERN = re.compile(rb'[ -~]{4,}') # Minimum length 4
+# .NET type/assembly noise and bare GUIDs, checked with a single search per string
+STRING_BLACKLIST_PATTERN = re.compile(
+    rb'System\.|PublicKeyToken|Version=|Culture='
+    rb'|^(?i:[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12})$'
+)
+STRING_CHUNK_SIZE = 1 << 20
+
+class StringTable:
+    """Printable strings of a buffer, stored as parallel offset and length arrays."""
+
+    def __init__(self, buffer, offsets, lengths):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.lengths = lengths
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def text(self, index):
+        offset = int(self.offsets[index])
+        return self.buffer[offset:offset + int(self.lengths[index])].decode('latin-1')
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield int(self.offsets[index]), self.text(index)
+
+def iter_strings(buffer, chunk_size=STRING_CHUNK_SIZE):
+    """Yield (offset, length) for every non-blacklisted printable run, in offset order.
+
+    Works over bytes or an mmap in fixed-size windows. Each window is cut back to
+    just before any printable bytes touching its end, and the next window starts
+    there (the overlap), so runs are never split and each is reported exactly once.
+    """
+    size = len(buffer)
+    start = 0
+    while start < size:
+        end = min(size, start + chunk_size)
+        if end < size:
+            cut = end
+            while cut > start and 32 <= buffer[cut - 1] <= 126:
+                cut -= 1
+            if cut == start:
+                # One run fills the whole window; grow the window until it ends
+                chunk_size *= 2
+                continue
+            end = cut
+        for match in PRINTABLE_RUN_PATTERN.finditer(buffer, start, end):
+            if not STRING_BLACKLIST_PATTERN.search(match.group(0)):
+                yield match.start(), match.end() - match.start()
+        start = end
+
 def extract_strings(data):
     """Extract potential marker name strings, VERY relaxed filtering for debugging."""
     print("Attempting to extract strings (RELAXED FILTERING)...") # DEBUG
-    strings = []
-    # Very broad search for printable ASCII sequences
-    for match in re.finditer(b'[ -~]{4,}', data): # Minimum length 4
-        try:
-            s = match.group(0).decode('latin-1') # Use latin-1 for broader compatibility
-            start_pos = match.start()
-
-            # Minimal filtering - just remove obvious noise/GUIDs
-            if "System." in s or "PublicKeyToken" in s or "Version=" in s or "Culture=" in s:
-                continue
-            if re.fullmatch(r'[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}', s, re.IGNORECASE):
-                continue
-            # Maybe filter out things ending in k__BackingField?
-            # if s.endswith("k__BackingField"): continue
-                
-            strings.append({
-                'position_offset': start_pos,
-                'text': s
-            })
-        except Exception:
-            continue # Ignore decoding errors
-
-    # Deduplicate
-    seen_strings = set()
-    unique_strings = []
-    strings.sort(key=lambda s: s['position_offset'])
-    for s in strings:
-        key = (s['text'], s['position_offset'])
-        if key not in seen_strings:
-            unique_strings.append(s)
-            seen_strings.add(key)
-            
-    print(f"Found {len(unique_strings)} strings with relaxed filtering.") # DEBUG
-    # for s in unique_strings[:20]: # Print first few found strings
-    #     print(f"  String @ {s['position_offset']}: {s['text'][:50]}") 
+    offsets = array('q')
+    lengths = array('I')
+    for offset, length in iter_strings(data):
+        offsets.append(offset)
+        lengths.append(length)
+    strings = StringTable(data, np.frombuffer(offsets, dtype=np.int64), np.frombuffer(lengths, dtype=np.uint32))
+    print(f"Found {len(strings)} strings with relaxed filtering.") # DEBUG
+    return strings
+
+def find_player_id(data, guids=None):
+    """Try to identify player ID in the data"""
+    if guids is None:
+        guids = index_guids(data)
 
-    return unique_strings
+    if len(guids.hyphenated):
+        return guids.guid_at(guids.hyphenated[0])  # Return the first UUID found
 
-def find_player_id(data):
-    """Try to identify player ID in the data"""
-    # Look for UUID patterns
-    text_data = data.decode('latin-1', errors='ignore')
-    uuid_pattern = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
-    uuids = re.findall(uuid_pattern, text_data, re.IGNORECASE)
-    
-    if uuids:
-        return uuids[0]  # Return the first UUID found
-    
     # If no standard UUID found, look for potential non-hyphenated UUIDs
-    uuid_no_hyphens = r'[0-9a-f]{32}'
-    uuids_nh = re.findall(uuid_no_hyphens, text_data, re.IGNORECASE)
-    if uuids_nh:
-        # Format as standard UUID
-        for potential_uuid in uuids_nh:
-            try:
-                # Try to parse and format as UUID
-                formatted_uuid = str(uuid.UUID(potential_uuid))
-                return formatted_uuid
-            except:
-                continue
-    
+    for offset, potential_uuid in guids.plain_guids():
+        try:
+            # Try to parse and format as UUID
+            return str(uuid.UUID(potential_uuid))
+        except ValueError:
+            continue
+
     return None
 
 def get_type_from_name(name):
@@ -172,35 +276,199 @@ def get_type_from_name(name):
         return "GENERAL" # Default for plausible names without specific prefix
     return "UNKNOWN"
 
+NAME_SEARCH_WINDOW = 10 # Strings probed after a coordinate
+NAME_MAX_DISTANCE = 50  # Max bytes between the end of a coordinate and its name
+
+class NameIndex:
+    """String offsets with their get_type_from_name type, classified once per string.
+
+    `candidates` holds the (sorted) indices of strings that can name a marker
+    (type other than UNKNOWN), so resolving a coordinate is two searchsorted lookups.
+    """
+
+    def __init__(self, strings):
+        self.strings = strings
+        self.offsets = strings.offsets
+        types = [get_type_from_name(strings.text(i)) for i in range(len(strings))]
+        self.type_names, codes = np.unique(np.array(types + ["UNKNOWN"]), return_inverse=True)
+        self.types = codes[:-1].astype(np.uint8)
+        unknown = int(codes[-1])
+        self.candidates = np.flatnonzero(self.types != unknown)
+
+    def type_of(self, index):
+        return str(self.type_names[self.types[index]])
+
+    def associate(self, end_offsets, window=NAME_SEARCH_WINDOW, max_distance=NAME_MAX_DISTANCE):
+        """Return the string index naming each coordinate ending at `end_offsets` (-1 if none).
+
+        A name is the first classified string among the `window` strings following
+        the coordinate, within `max_distance` bytes. Coordinates are resolved in the
+        given order and each string names at most one of them, like the old probe loop.
+        """
+        ends = np.asarray(end_offsets, dtype=np.int64)
+        result = np.full(len(ends), -1, dtype=np.int64)
+        if len(ends) == 0 or len(self.candidates) == 0:
+            return result
+
+        starts = np.searchsorted(self.offsets, ends)
+        limits = np.minimum(starts + window, len(self.offsets))
+        ranks = np.searchsorted(self.candidates, starts)
+        picks = self.candidates[np.minimum(ranks, len(self.candidates) - 1)]
+        valid = (ranks < len(self.candidates)) & (picks < limits) & (self.offsets[picks] - ends < max_distance)
+        result[valid] = picks[valid]
+
+        # A string already claimed by an earlier coordinate falls through to the next
+        # candidate; only coordinates from the first collision on need a sequential pass
+        claimed = result[result >= 0]
+        _, first_seen = np.unique(claimed, return_index=True)
+        if len(first_seen) == len(claimed):
+            return result
+        first_collision = int(np.flatnonzero(result >= 0)[np.setdiff1d(np.arange(len(claimed)), first_seen).min()])
+        taken = set(result[:first_collision][result[:first_collision] >= 0].tolist())
+        for m in range(first_collision, len(ends)):
+            result[m] = -1
+            rank = int(ranks[m])
+            while rank < len(self.candidates):
+                pick = int(self.candidates[rank])
+                if pick >= limits[m] or self.offsets[pick] - ends[m] >= max_distance:
+                    break
+                if pick not in taken:
+                    result[m] = pick
+                    taken.add(pick)
+                    break
+                rank += 1
+        return result
+
+def _pack_coord_keys(x, y, z):
+    """Pack <hhb coordinates into one int64 key (x and y as 16 bits, z as 8 bits)."""
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    z = np.asarray(z, dtype=np.int64)
+    return ((x + 32768) << 24) | ((y + 32768) << 8) | (z + 128)
+
+def decode_coord_keys(data):
+    """Decode every byte offset of `data` as a packed <hhb key in one vectorized pass.
+
+    The shorts are read through two int16 views of the buffer (even and odd
+    alignment) and Z through an int8 view, so no per-offset struct.unpack is needed.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    n = len(buf) - 5 + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    keys = np.empty(n, dtype=np.int64)
+    for align in (0, 1):
+        count = len(range(align, n, 2)) # Offsets align, align+2, ... below n
+        if count == 0:
+            continue
+        words = np.frombuffer(data, dtype='<i2', count=(len(buf) - align) // 2, offset=align)
+        words = words.astype(np.int64) + 32768
+        # At offset align+2k, X is word k and Y is word k+1
+        keys[align::2] = (words[:count] << 24) | (words[1:count + 1] << 8)
+    keys += buf[4:4 + n].view(np.int8).astype(np.int64) + 128
+    return keys
+
+def neighbor_coords(center, tolerance=1):
+    """Return center followed by its X/Y neighbors within `tolerance`, nearest first."""
+    cx, cy, cz = center
+    deltas = [(dx, dy) for dy in range(-tolerance, tolerance + 1) for dx in range(-tolerance, tolerance + 1)]
+    deltas.sort(key=lambda d: (max(abs(d[0]), abs(d[1])), abs(d[0]) + abs(d[1]), d[0] == 0))
+    return [(cx + dx, cy + dy, cz) for dx, dy in deltas]
+
+COORD_SCAN_CHUNK_SIZE = 1 << 24
+
+def scan_coord_offsets(data, coords, tolerance=1, chunk_size=COORD_SCAN_CHUNK_SIZE):
+    """Find the offsets of many <hhb coordinates (plus neighbors) in a single pass.
+
+    Returns a dict mapping every tested coordinate (each center and its neighbors)
+    to the sorted list of offsets where it occurs. The buffer is decoded in windows
+    of `chunk_size` offsets (overlapping by 4 bytes), so memory stays bounded for
+    large mmapped files.
+    """
+    candidates = list(dict.fromkeys(
+        coord for center in coords for coord in neighbor_coords(center, tolerance)))
+    results = {coord: [] for coord in candidates}
+    if not candidates:
+        return results
+
+    cand = np.array(candidates, dtype=np.int64)
+    target_keys = _pack_coord_keys(cand[:, 0], cand[:, 1], cand[:, 2])
+    order = np.argsort(target_keys)
+
+    for start in range(0, max(len(data) - 4, 0), chunk_size):
+        window = memoryview(data)[start:start + chunk_size + 4]
+        keys = decode_coord_keys(window)
+        hit_offsets = np.flatnonzero(np.isin(keys, target_keys))
+        if len(hit_offsets) == 0:
+            continue
+        # Map each hit back to the coordinate it matched
+        idx = order[np.searchsorted(target_keys, keys[hit_offsets], sorter=order)]
+        for offset, cand_idx in zip(hit_offsets.tolist(), idx.tolist()):
+            results[candidates[cand_idx]].append(start + offset)
+    return results
+
 def find_coord_offsets(data, x, y, z):
-    """Find all offsets where the specific coordinate (x,y,z) exists as <hhb via manual scan."""
+    """Find all offsets where the specific coordinate (x,y,z) exists as <hhb."""
+    return scan_coord_offsets(data, [(x, y, z)], tolerance=0)[(x, y, z)]
+
+def _find_coord_offsets_struct(data, x, y, z):
+    """Original per-offset struct.unpack scan, kept as the benchmark baseline."""
     target_coords = (x, y, z)
     offsets = []
-    # Scan byte by byte, trying to unpack <hhb
     for i in range(len(data) - 5 + 1):
-        try:
-            unpacked_coords = struct.unpack("<hhb", data[i:i+5])
-            if unpacked_coords == target_coords:
-                offsets.append(i)
-        except struct.error:
-            continue # Couldn't unpack, move to next byte
-        except Exception:
-            continue # Ignore other potential errors during scan
+        if struct.unpack("<hhb", data[i:i+5]) == target_coords:
+            offsets.append(i)
     return offsets
 
+def benchmark_coord_scan(filepath, coords, tolerance=1, repeats=3):
+    """Time the struct.unpack baseline against the vectorized scanner on one file."""
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    print(f"Benchmarking <hhb coordinate scan on {os.path.basename(filepath)} ({len(data)} bytes), "
+          f"{len(coords)} markers, tolerance {tolerance}")
+
+    tested = [c for center in coords for c in neighbor_coords(center, tolerance)]
+    start = time.perf_counter()
+    baseline = {c: _find_coord_offsets_struct(data, *c) for c in tested}
+    baseline_time = time.perf_counter() - start
+
+    vector_time = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        vectorized = scan_coord_offsets(data, coords, tolerance)
+        vector_time = min(vector_time, time.perf_counter() - start)
+
+    mismatches = [c for c in tested if baseline[c] != vectorized[c]]
+    print(f"  struct.unpack scan ({len(tested)} passes): {baseline_time * 1000:.1f} ms")
+    print(f"  vectorized scan (1 pass, best of {repeats}): {vector_time * 1000:.1f} ms")
+    print(f"  speedup: {baseline_time / max(vector_time, 1e-9):.1f}x, mismatches: {len(mismatches)}")
+    return baseline_time, vector_time, mismatches
+
+def map_file(filepath):
+    """Memory-map a file read-only. Empty files (which cannot be mapped) give b''."""
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return contextlib.nullcontext(b'')
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
 def extract_marker_data(filepath, output_json=None):
     """Extract specific, known markers by finding their <hhb coordinates and looking for nearby strings."""
     print(f"--- Processing (Known <hhb Coords Scan): {os.path.basename(filepath)} ---")
     try:
-        with open(filepath, 'rb') as f:
-            data = f.read()
+        mapped = map_file(filepath)
     except FileNotFoundError:
         print(f"Error: File not found at {filepath}")
         return None
     except Exception as e:
         print(f"Error reading file {filepath}: {e}")
         return None
-    print(f"Read {len(data)} bytes from file.")
+    with mapped as data:
+        print(f"Mapped {len(data)} bytes from file.")
+        return _extract_marker_data(data, filepath, output_json)
+
+def _extract_marker_data(data, filepath, output_json):
+    """Body of extract_marker_data, working on a bytes-like buffer or mmap."""
 
     strings = []
     try:
@@ -213,18 +481,11 @@ def extract_marker_data(filepath, output_json=None):
     else:
         print(f"Found {len(strings)} potential name strings after filtering.")
 
-    # Define known markers from debug-markers.txt
-    known_markers_coords = {
-        # (x, y, z): "Expected Name"
-        (1653, 2869, 1) : "DEBUG - M1",
-        (1648, 2869, 1) : "DEBUG - M2",
-        (1636, 2869, 1) : "DEBUG - M3",
-        (1653, 2862, 1) : "DEBUG - M4", # Assuming Z=1 based on others
-        # Add others if needed
-    }
+    known_markers_coords = KNOWN_MARKERS_COORDS
 
     # Prepare output
-    player_id = find_player_id(data)
+    guids = index_guids(data, default_cache_dir(filepath)) # One GUID scan per file, reused by the lookups and later runs
+    player_id = find_player_id(data, guids)
     file_signature = binascii.crc32(data)
     # Basic map name assumption - adjust if the debug marker is on a different map
     map_name = "IRUMESA" 
@@ -243,71 +504,52 @@ def extract_marker_data(filepath, output_json=None):
     }
 
     markers_found = []
-    processed_string_indices = set()
-    string_lookup = {s['position_offset']: idx for idx, s in enumerate(strings)}
-    sorted_string_offsets = sorted(string_lookup.keys())
 
     # Find known coordinates (and neighbors) and associate names
     print("Scanning for known coordinate byte sequences (<hhb) and neighbors...")
     found_count = 0
     processed_marker_names = set() # Keep track to avoid duplicate entries if neighbors overlap
 
+    # Decode the buffer once and match every marker (and its neighbors) in one pass
+    coord_hits = scan_coord_offsets(data, list(known_markers_coords.keys()), tolerance=1)
+
+    found = [] # (center_coords, expected_name, first coordinate offset)
     for center_coords, expected_name in known_markers_coords.items():
         if expected_name in processed_marker_names:
             continue # Already found and processed this named marker
 
-        cx, cy, cz = center_coords
-        coords_to_test = [
-            center_coords, 
-            (cx-1, cy, cz), (cx+1, cy, cz),
-            (cx, cy-1, cz), (cx, cy+1, cz),
-            (cx-1, cy-1, cz), (cx+1, cy-1, cz),
-            (cx-1, cy+1, cz), (cx+1, cy+1, cz)
-        ]
-
         found_offsets = []
-        found_test_coord = None
-
-        for test_coords in coords_to_test:
-            tx, ty, tz = test_coords
-            offsets = find_coord_offsets(data, tx, ty, tz)
+        for test_coords in neighbor_coords(center_coords, tolerance=1):
+            offsets = coord_hits.get(test_coords)
             if offsets:
                 found_offsets = offsets
-                found_test_coord = test_coords
                 print(f"  + Found sequence for {expected_name} (tested {test_coords}) at offset(s): {found_offsets}")
                 break # Found a match (center or neighbor), stop testing for this marker
-            
+
         if not found_offsets:
             print(f"  - Sequence for {expected_name} (or neighbors) not found.")
             continue
+        found.append((center_coords, expected_name, found_offsets[0]))
+        processed_marker_names.add(expected_name)
 
-        # --- String Association (using the first found offset) ---
-        coord_offset = found_offsets[0]
-        pos_end_offset = coord_offset + 5 # <hhb is 5 bytes
-        best_name = ""
-        best_name_type = get_type_from_name(expected_name)
-        found_string_idx = -1
-        start_search_idx = bisect.bisect_left(sorted_string_offsets, pos_end_offset)
-        for i in range(start_search_idx, min(start_search_idx + 10, len(sorted_string_offsets))):
-            str_offset = sorted_string_offsets[i]
-            original_str_idx = string_lookup[str_offset]
-            if (str_offset - pos_end_offset) < 50 and original_str_idx not in processed_string_indices:
-                s_text = strings[original_str_idx]['text']
-                s_type = get_type_from_name(s_text)
-                if s_type != "UNKNOWN":
-                    best_name = s_text
-                    if s_type != "GENERAL" and s_type != "UNKNOWN_ID":
-                        best_name_type = s_type
-                    found_string_idx = original_str_idx
-                    print(f"    Associated string '{best_name}' (type: {s_type}) at offset {str_offset}")
-                    break
+    # --- String Association (using the first found offset) ---
+    # Strings are classified once when the index is built; all links resolve in one pass
+    name_index = NameIndex(strings)
+    name_indices = name_index.associate([coord_offset + 5 for _, _, coord_offset in found]) # <hhb is 5 bytes
 
-        if found_string_idx != -1:
-            processed_string_indices.add(found_string_idx)
+    for (center_coords, expected_name, coord_offset), string_idx in zip(found, name_indices):
+        cx, cy, cz = center_coords
+        best_name_type = get_type_from_name(expected_name)
+        if string_idx >= 0:
+            best_name = strings.text(string_idx)
+            s_type = name_index.type_of(string_idx)
+            if s_type != "GENERAL" and s_type != "UNKNOWN_ID":
+                best_name_type = s_type
+            print(f"  {expected_name}: associated string '{best_name}' (type: {s_type}) at offset {int(strings.offsets[string_idx])}")
         else:
-            print(f"    Could not associate a plausible string nearby.")
+            print(f"  {expected_name}: could not associate a plausible string nearby.")
             best_name = expected_name # Use expected name if association failed
-        
+
         # --- Create Marker --- 
         marker_map = map_name # Assuming IRUMESA unless file path indicates otherwise
         if "THESOLITARYISLES" in filepath.upper(): 
@@ -324,7 +566,6 @@ def extract_marker_data(filepath, output_json=None):
         }
         markers_found.append(marker)
         found_count += 1
-        processed_marker_names.add(expected_name)
 
     output['markers'] = markers_found
     print(f"Processed {found_count} known markers (including neighbors).")
@@ -342,19 +583,35 @@ def extract_marker_data(filepath, output_json=None):
     return output
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract known markers from a .minimapdata file.")
+    parser.add_argument("--benchmark", metavar="FILE",
+                        help="Compare the struct.unpack and vectorized <hhb scanners on FILE and exit.")
+    parser.add_argument("--positions", metavar="FILE",
+                        help="Print the GUID-linked <fff marker positions found in FILE as JSON and exit.")
+    parser.add_argument("input_file", nargs="?", default="tools/scripts/source/markers.minimapdata",
+                        help="Marker file to extract. Default: %(default)s")
+    parser.add_argument("--output", help="Output JSON path. Default: output/debug_markers.json next to this script.")
+    args = parser.parse_args()
+
+    if args.positions:
+        with map_file(args.positions) as data, contextlib.redirect_stdout(sys.stderr):
+            positions = extract_float_positions(data) # Keep progress output off stdout
+        print(json.dumps(positions, indent=4))
+        raise SystemExit(0)
+
+    if args.benchmark:
+        benchmark_coord_scan(args.benchmark, list(KNOWN_MARKERS_COORDS.keys()))
+        raise SystemExit(0)
+
     # Define file paths - focusing on the debug file
-    debug_markers_file = "tools/scripts/source/markers.minimapdata"
-    # your_markers_file = "D:/Documents/Development/ethyrialwiki/ethyrialwiki/tools/scripts/minimap_data/markers.minimapdata"
-    # your_entities_file = "D:/Documents/Development/ethyrialwiki/ethyrialwiki/tools/scripts/minimap_data/entities.minimapdata"
-    
-    # Create output folder
-    output_dir = "D:/Documents/Development/ethyrialwiki/ethyrialwiki/tools/scripts/output"
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Define output JSON for the debug file
-    debug_markers_json = os.path.join(output_dir, "debug_markers.json")
-    # your_markers_json = os.path.join(output_dir, "your_markers.json")
-    # your_entities_json = os.path.join(output_dir, "your_entities.json")
+    debug_markers_file = args.input_file
+    # For many contributor files at once use batch_extract_markers.py instead
+
+    # Create output folder (relative to this script unless --output is given)
+    debug_markers_json = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "output", "debug_markers.json")
+    output_dir = os.path.dirname(debug_markers_json)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
     
     # Extract data ONLY from the debug file
     print(f"\n--- Starting extraction for debug file: {debug_markers_file} ---")
@@ -10,6 +10,10 @@ import time
 import logging
 from datetime import datetime
 
+# The terrain underlay is read through tools/scripts/terrain_cache.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tools', 'scripts'))
+from terrain_cache import load_terrain, composite_origin, tile_image
+
 # Setup logging
 def setup_logging(output_dir):
     log_dir = os.path.join(output_dir, 'logs')
@@ -90,6 +94,17 @@ def get_background_chunk(x, y, background_image):
         print(f"Error extracting background chunk for ({x},{y}): {e}")
         return None
 
+def get_terrain_underlay(x, y, terrain, offset, tile_size, min_x, max_y):
+    """
+    Terrain under grid tile (x, y), aligned like generate_terrain_tiles.py: the
+    composite position of the tile (terrain_cache.composite_origin) shifted by
+    the (tx, ty) offset of the composite on the terrain. Parts outside the
+    terrain are transparent.
+    """
+    tile_width, tile_height = tile_size
+    composite_x, composite_y = composite_origin(x, y, min_x, max_y, tile_width, tile_height)
+    return tile_image(terrain, composite_x + offset[0], composite_y + offset[1], tile_width, tile_height)
+
 def load_tile_from_minimap(filepath, expected_size):
     try:
         with open(filepath, 'rb') as f:
@@ -122,7 +137,11 @@ def load_tile_from_minimap(filepath, expected_size):
         print(f"Error loading minimap file {filepath}: {e}")
         return None
 
-def main(minimap_input_dir, background_input_path, output_dir):
+def main(minimap_input_dir, background_input_path, output_dir, terrain_path=None, terrain_offset=(200, 350),
+         terrain_cache_dir=None):
+    """Extract the Z tiles of the 6x5 grid. With `terrain_path`, every saved tile is
+    composited over its aligned terrain crop (alpha-over), so one merged tile is written
+    per X-Y-Z instead of separate terrain tiles."""
     # Start timing
     start_time = time.time()
     
@@ -160,6 +179,18 @@ def main(minimap_input_dir, background_input_path, output_dir):
     bg_load_time = time.time() - bg_load_start
     logging.info(f"Background image loaded in {bg_load_time:.2f} seconds")
 
+    # Optional terrain underlay, mapped from the raster cache
+    terrain = None
+    if terrain_path:
+        try:
+            terrain = load_terrain(terrain_path, terrain_cache_dir)
+        except Exception as e:
+            error_msg = f"Error loading terrain image {terrain_path}: {e}"
+            print(f"Error: {error_msg}")
+            logging.error(error_msg)
+            sys.exit(1)
+        logging.info(f"Compositing tiles over terrain {terrain_path} ({terrain.shape[1]}x{terrain.shape[0]}) at offset {terrain_offset}")
+
     # Create output directory using provided path
     # output_dir = os.path.join(minimap_dir, 'extracted') # Use argument directly
     os.makedirs(output_dir, exist_ok=True)
@@ -238,6 +269,10 @@ def main(minimap_input_dir, background_input_path, output_dir):
             # Removed unused: base_image_for_coord = None
             coord_processed = 0
             coord_errors = 0
+            # The terrain under this (X,Y) is the same for every Z
+            underlay = None
+            if terrain is not None:
+                underlay = get_terrain_underlay(x, y, terrain, terrain_offset, (tile_width, tile_height), min_x, max_y)
 
             for z in range(global_min_z, global_max_z + 1):
                 # Use provided output_dir
@@ -312,7 +347,11 @@ def main(minimap_input_dir, background_input_path, output_dir):
                 # 4. Save & Cache Result
                 if result_image:
                     try:
-                        result_image.save(output_path, 'PNG')
+                        # The cache keeps the plain layer; only the saved tile gets the terrain underneath
+                        output_image = result_image
+                        if underlay is not None:
+                            output_image = Image.alpha_composite(underlay, result_image.convert('RGBA'))
+                        output_image.save(output_path, 'PNG')
                         processed_layer_cache[(x, y, z)] = result_image # Cache successful result
                         processed_count += 1
                         coord_processed += 1
@@ -369,11 +408,16 @@ if __name__ == '__main__':
     parser.add_argument("--input-dir", required=True, help="Directory containing the .minimap files.")
     parser.add_argument("--background-file", required=True, help="Path to the background image file (e.g., background.png).")
     parser.add_argument("--output-dir", required=True, help="Directory to save the extracted and combined PNG tiles.")
+    parser.add_argument("--terrain", help="Terrain image to composite underneath every tile (one merged tile instead of separate X-Y-terrain.png files).")
+    parser.add_argument("--offset-tx", type=int, default=200, help="Horizontal offset of the tile grid on the terrain. Default: %(default)s")
+    parser.add_argument("--offset-ty", type=int, default=350, help="Vertical offset of the tile grid on the terrain. Default: %(default)s")
+    parser.add_argument("--terrain-cache-dir", help="Directory of the decoded terrain raster cache (default: terrain_cache/ next to the terrain image).")
 
     args = parser.parse_args()
 
     # Call main function with parsed arguments
-    errors = main(args.input_dir, args.background_file, args.output_dir)
+    errors = main(args.input_dir, args.background_file, args.output_dir,
+                  args.terrain, (args.offset_tx, args.offset_ty), args.terrain_cache_dir)
     
     # Exit with non-zero code if errors occurred
     if errors > 0:
@@ -0,0 +1,118 @@
+import os
+import sys
+import re
+import hashlib
+import argparse
+import numpy as np
+
+# Scanned independently (as the tools did before the index), so a 32-hex run
+# next to a hyphenated GUID can never hide it
+HYPHENATED_PATTERN = re.compile(rb'(?i:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})')
+PLAIN_PATTERN = re.compile(rb'(?i:[0-9a-f]{32})')
+HYPHENATED_LENGTH = 36
+PLAIN_LENGTH = 32
+SCAN_VERSION = 2 # Part of the cache file name; bump when scan_guids changes
+CACHE_DIR_NAME = 'guid_cache' # Created next to the scanned file by the tools
+MEMORY_CACHE_SIZE = 8 # Scans kept in-process, oldest evicted first
+
+_memory_cache = {} # file hash -> (hyphenated offsets, plain offsets), in insertion order
+
+
+class GuidIndex:
+    """Start offsets of every GUID in a buffer, split into hyphenated and plain 32-hex.
+
+    Both arrays are sorted int64 offsets; the GUID text is read back from the
+    buffer on demand, so the index itself stays a few bytes per GUID.
+    """
+
+    def __init__(self, data, hyphenated, plain, file_hash=None):
+        self.data = data
+        self.hyphenated = hyphenated
+        self.plain = plain
+        self.file_hash = file_hash
+
+    def __len__(self):
+        return len(self.hyphenated) + len(self.plain)
+
+    def guid_at(self, offset, length=HYPHENATED_LENGTH):
+        offset = int(offset)
+        return bytes(self.data[offset:offset + length]).decode('ascii')
+
+    def hyphenated_guids(self):
+        """Yield (offset, guid text) for every hyphenated GUID, in file order."""
+        for offset in self.hyphenated.tolist():
+            yield offset, self.guid_at(offset, HYPHENATED_LENGTH)
+
+    def plain_guids(self):
+        """Yield (offset, 32-hex text) for every non-hyphenated GUID, in file order."""
+        for offset in self.plain.tolist():
+            yield offset, self.guid_at(offset, PLAIN_LENGTH)
+
+
+def default_cache_dir(filepath):
+    return os.path.join(os.path.dirname(os.path.abspath(filepath)), CACHE_DIR_NAME)
+
+
+def hash_data(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def scan_guids(data):
+    """Find all hyphenated and 32-hex GUIDs in bytes (or an mmap): one regex pass for each form."""
+    hyphenated = np.fromiter((m.start() for m in HYPHENATED_PATTERN.finditer(data)), dtype=np.int64)
+    plain = np.fromiter((m.start() for m in PLAIN_PATTERN.finditer(data)), dtype=np.int64)
+    return hyphenated, plain
+
+
+def index_guids(data, cache_dir=None):
+    """Return the GuidIndex of `data`, reusing a cached scan of identical content.
+
+    The last MEMORY_CACHE_SIZE scans are memoized in-process by content hash; with
+    `cache_dir` (the tools pass default_cache_dir of the file) they are also stored
+    as <hash>-v<SCAN_VERSION>.npz there, so other tools and later runs skip the scan.
+    """
+    file_hash = hash_data(data)
+    cached = _memory_cache.get(file_hash)
+
+    cache_path = os.path.join(cache_dir, f"{file_hash}-v{SCAN_VERSION}.npz") if cache_dir else None
+    if cached is None and cache_path and os.path.exists(cache_path):
+        with np.load(cache_path, allow_pickle=False) as npz:
+            cached = (npz['hyphenated'], npz['plain'])
+
+    if cached is None:
+        cached = scan_guids(data)
+        if cache_path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                np.savez(cache_path, hyphenated=cached[0], plain=cached[1])
+            except OSError:
+                pass # A read-only location only loses the disk cache
+    _memory_cache.pop(file_hash, None) # Re-inserted as the most recent
+    _memory_cache[file_hash] = cached
+    while len(_memory_cache) > MEMORY_CACHE_SIZE:
+        del _memory_cache[next(iter(_memory_cache))]
+
+    return GuidIndex(data, cached[0], cached[1], file_hash)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="List the GUIDs found in a binary file.")
+    parser.add_argument("input_file", help="File to scan.")
+    parser.add_argument("--cache-dir", help=f"Directory for cached GUID offsets (<hash>-v<version>.npz). "
+                                            f"Default: {CACHE_DIR_NAME}/ next to the input file")
+    args = parser.parse_args()
+
+    try:
+        with open(args.input_file, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        print(f"Error: Could not read {args.input_file}: {e}")
+        sys.exit(1)
+
+    index = index_guids(data, args.cache_dir or default_cache_dir(args.input_file))
+    print(f"{args.input_file}: {len(index.hyphenated)} hyphenated and {len(index.plain)} 32-hex GUIDs "
+          f"(hash {index.file_hash})")
+    for offset, guid in index.hyphenated_guids():
+        print(f"  {offset:8d}  {guid}")
+    for offset, guid in index.plain_guids():
+        print(f"  {offset:8d}  {guid}")
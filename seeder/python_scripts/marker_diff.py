@@ -0,0 +1,145 @@
+import sys
+import json
+import argparse
+import time
+
+from marker_store import normalize_marker_entry
+
+READ_CHUNK_SIZE = 1 << 16
+_WHITESPACE = ' \t\r\n'
+
+
+def iter_json_entries(path, chunk_size=READ_CHUNK_SIZE):
+    """Yield the marker objects of a dump one at a time without loading the whole file.
+
+    Handles the C# dump shape ({"$values": [...]}), a plain JSON list and .jsonl files.
+    Objects are parsed with JSONDecoder.raw_decode from a buffer that is refilled
+    in `chunk_size` pieces, so memory stays at about one entry plus one chunk.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = f.read(chunk_size)
+        pos = 0
+        eof = not buf
+
+        def fill():
+            nonlocal buf, pos, eof
+            more = f.read(chunk_size)
+            if not more:
+                eof = True
+            buf = buf[pos:] + more
+            pos = 0
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        # Find the start of the marker list: either "$values": [ or a top-level [
+        skip(_WHITESPACE)
+        if path.endswith('.jsonl'):
+            separators = _WHITESPACE
+        elif pos < len(buf) and buf[pos] == '{':
+            while True:
+                start = buf.find('"$values"', pos)
+                if start >= 0:
+                    start = buf.find('[', start)
+                if start >= 0:
+                    pos = start + 1
+                    break
+                if eof:
+                    return
+                pos = max(pos, len(buf) - 16) # Keep a partial key across the refill
+                fill()
+            separators = _WHITESPACE + ','
+        elif pos < len(buf) and buf[pos] == '[':
+            pos += 1
+            separators = _WHITESPACE + ','
+        else:
+            raise json.JSONDecodeError("Expected a marker dump object or list", buf, pos)
+
+        while True:
+            skip(separators)
+            if pos >= len(buf) or buf[pos] in ']}':
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill() # Entry continues past the buffer
+                continue
+            pos = end
+            yield item
+
+
+def iter_markers(path, chunk_size=READ_CHUNK_SIZE):
+    for item in iter_json_entries(path, chunk_size):
+        yield normalize_marker_entry(item)
+
+
+def diff_markers(old_markers, new_markers, tolerance=0.0):
+    """Yield change events between two marker streams, keyed by GUID.
+
+    The old markers are loaded into a dict; the new ones are streamed past it, so
+    only one side is held in memory. Events are dicts with an "op" of added,
+    removed, moved or renamed (a marker can be both moved and renamed).
+    """
+    old_by_guid = {}
+    for marker in old_markers:
+        old_by_guid[marker['guid']] = marker
+
+    seen = set()
+    for marker in new_markers:
+        guid = marker['guid']
+        if guid in seen:
+            continue # Duplicate GUID in the new dump, the first entry wins
+        seen.add(guid)
+
+        old = old_by_guid.pop(guid, None)
+        if old is None:
+            yield {"op": "added", **marker}
+            continue
+        if any(abs((marker[k] or 0) - (old[k] or 0)) > tolerance for k in ('x', 'y', 'z')):
+            yield {"op": "moved", **marker, "from": {"x": old['x'], "y": old['y'], "z": old['z']}}
+        if marker['name'] != old['name'] or marker['description'] != old['description']:
+            yield {"op": "renamed", **marker, "old_name": old['name'], "old_description": old['description']}
+
+    for marker in old_by_guid.values():
+        yield {"op": "removed", **marker}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Diff two marker dumps by GUID and print added/removed/moved/renamed markers as JSON lines.")
+    parser.add_argument("old_dump", help="Previous dump (markers_markers_full_dump.json, JSON list or JSONL).")
+    parser.add_argument("new_dump", help="New dump, streamed entry by entry.")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL path, or '-' for stdout. Default: %(default)s")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="Coordinate change (world units) below which a marker is not reported as moved.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = {"added": 0, "removed": 0, "moved": 0, "renamed": 0}
+    out = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    try:
+        for event in diff_markers(iter_markers(args.old_dump), iter_markers(args.new_dump), args.tolerance):
+            counts[event['op']] += 1
+            out.write(json.dumps(event, ensure_ascii=False) + "\n")
+    except FileNotFoundError as e:
+        print(f"Error: Dump not found: {e.filename}", file=sys.stderr)
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: Could not parse dump: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    summary = ", ".join(f"{count} {op}" for op, count in counts.items())
+    print(f"Marker diff: {summary} ({elapsed * 1000:.1f} ms)", file=sys.stderr)
@@ -0,0 +1,246 @@
+import os
+import sys
+import json
+import argparse
+import time
+import numpy as np
+
+DEFAULT_CELL_SIZE = 64 # World units per grid cell
+STORE_VERSION = 1
+
+# Packed cell key: floor (16 bits) | cell x (20 bits) | cell y (20 bits)
+_CELL_BIAS = 1 << 19
+_FLOOR_BIAS = 1 << 15
+
+
+def _cell_keys(floors, cx, cy):
+    floors = np.asarray(floors, dtype=np.int64)
+    cx = np.asarray(cx, dtype=np.int64)
+    cy = np.asarray(cy, dtype=np.int64)
+    return ((floors + _FLOOR_BIAS) << 40) | ((cx + _CELL_BIAS) << 20) | (cy + _CELL_BIAS)
+
+
+def load_marker_entries(path):
+    """Read markers from a dump JSON ($values list), a plain JSON list or a JSONL file.
+
+    Accepts both the C# dump shape (Guid/GetTitle/Position) and the flat records of
+    decode_markers.marker_record (guid/name/x/y/z). Returns a list of flat dicts.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            raw = [json.loads(line) for line in f if line.strip()]
+        else:
+            raw = json.load(f)
+    if isinstance(raw, dict):
+        raw = raw.get('$values', [])
+    return [normalize_marker_entry(item) for item in raw]
+
+
+def normalize_marker_entry(item):
+    """Flatten one dump entry (C# dump or marker_record shape) to guid/name/description/x/y/z."""
+    if 'Guid' in item:
+        position = item.get('Position') or {}
+        return {
+            "guid": item.get('Guid'),
+            "name": item.get('GetTitle'),
+            "description": item.get('GetDescription'),
+            "x": position.get('X', 0),
+            "y": position.get('Y', 0),
+            "z": position.get('Z', 0),
+        }
+    return {
+        "guid": item.get('guid'),
+        "name": item.get('name'),
+        "description": item.get('description'),
+        "x": item.get('x', 0),
+        "y": item.get('y', 0),
+        "z": item.get('z', 0),
+    }
+
+
+class MarkerStore:
+    """Markers bucketed in a per-floor uniform grid.
+
+    Markers are sorted by their packed (floor, cell x, cell y) key, so every grid
+    cell is a contiguous slice found with searchsorted. The arrays are saved as-is
+    to an .npz file, so reloading needs no JSON parsing and no re-indexing.
+    """
+
+    def __init__(self, guids, names, descriptions, xyz, cell_size=DEFAULT_CELL_SIZE):
+        xyz = np.asarray(xyz, dtype=np.float32).reshape(-1, 3)
+        self.cell_size = int(cell_size)
+        floors = np.rint(xyz[:, 2]).astype(np.int64)
+        cells = np.floor_divide(xyz[:, :2], self.cell_size).astype(np.int64)
+        keys = _cell_keys(floors, cells[:, 0], cells[:, 1])
+        order = np.argsort(keys, kind='stable')
+
+        self.keys = keys[order]
+        self.xyz = xyz[order]
+        self.floors = floors[order]
+        self.guids = np.asarray(guids, dtype=str)[order]
+        self.names = np.asarray(names, dtype=str)[order]
+        self.descriptions = np.asarray(descriptions, dtype=str)[order]
+
+    @classmethod
+    def from_entries(cls, entries, cell_size=DEFAULT_CELL_SIZE):
+        return cls(
+            [e['guid'] or "" for e in entries],
+            [e['name'] or "" for e in entries],
+            [e['description'] or "" for e in entries],
+            [(e['x'], e['y'], e['z']) for e in entries],
+            cell_size,
+        )
+
+    @classmethod
+    def from_dump(cls, path, cell_size=DEFAULT_CELL_SIZE):
+        return cls.from_entries(load_marker_entries(path), cell_size)
+
+    def save(self, path):
+        """Persist the index (arrays are already in grid order) as an .npz file."""
+        np.savez(path, version=STORE_VERSION, cell_size=self.cell_size, keys=self.keys, xyz=self.xyz,
+                 floors=self.floors, guids=self.guids, names=self.names, descriptions=self.descriptions)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != STORE_VERSION:
+                raise ValueError(f"Unsupported marker store version {int(data['version'])} in {path}")
+            store = cls.__new__(cls)
+            store.cell_size = int(data['cell_size'])
+            for name in ('keys', 'xyz', 'floors', 'guids', 'names', 'descriptions'):
+                setattr(store, name, data[name])
+        return store
+
+    def __len__(self):
+        return len(self.keys)
+
+    def floor_list(self):
+        return np.unique(self.floors).tolist()
+
+    def _floor_range(self, floor):
+        lo = np.searchsorted(self.keys, _cell_keys(floor, -_CELL_BIAS, -_CELL_BIAS))
+        hi = np.searchsorted(self.keys, _cell_keys(floor + 1, -_CELL_BIAS, -_CELL_BIAS))
+        return int(lo), int(hi)
+
+    def _candidates(self, x0, y0, x1, y1, floor):
+        """Indices of markers on `floor` in the grid cells overlapping the bbox."""
+        cx0, cy0 = int(x0 // self.cell_size), int(y0 // self.cell_size)
+        cx1, cy1 = int(x1 // self.cell_size), int(y1 // self.cell_size)
+        lo, hi = self._floor_range(floor)
+        if hi - lo <= (cx1 - cx0 + 1) * 2:
+            return np.arange(lo, hi) # Fewer markers on the floor than cell columns to probe
+
+        # Cells of one column (same cell x) are contiguous, so one slice per column
+        columns = np.arange(cx0, cx1 + 1)
+        starts = np.searchsorted(self.keys, _cell_keys(floor, columns, cy0))
+        ends = np.searchsorted(self.keys, _cell_keys(floor, columns, cy1), side='right')
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)] or [np.empty(0, dtype=np.int64)])
+
+    def _floors_for(self, z):
+        return self.floor_list() if z is None else [int(round(z))]
+
+    def bbox(self, x0, y0, x1, y1, z=None):
+        """Indices of markers with x0 <= x <= x1 and y0 <= y <= y1 (on floor z, or any floor)."""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        found = []
+        for floor in self._floors_for(z):
+            idx = self._candidates(x0, y0, x1, y1, floor)
+            pts = self.xyz[idx]
+            inside = (pts[:, 0] >= x0) & (pts[:, 0] <= x1) & (pts[:, 1] >= y0) & (pts[:, 1] <= y1)
+            found.append(idx[inside])
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def radius(self, x, y, r, z=None):
+        """Indices of markers within distance r of (x, y), nearest first."""
+        idx = self.bbox(x - r, y - r, x + r, y + r, z)
+        d2 = (self.xyz[idx, 0] - x) ** 2 + (self.xyz[idx, 1] - y) ** 2
+        keep = d2 <= r * r
+        idx, d2 = idx[keep], d2[keep]
+        return idx[np.argsort(d2, kind='stable')]
+
+    def nearest(self, x, y, k=1, z=None):
+        """Indices of the k markers nearest to (x, y), nearest first.
+
+        Grows a radius query from one cell until it holds k markers; every marker
+        closer than the k-th hit is then inside the searched circle.
+        """
+        if z is None:
+            total = len(self)
+        else:
+            lo, hi = self._floor_range(int(round(z)))
+            total = hi - lo
+        k = min(k, total)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        r = float(self.cell_size)
+        while True:
+            idx = self.radius(x, y, r, z)
+            if len(idx) >= k:
+                return idx[:k]
+            r *= 2
+
+    def record(self, index):
+        x, y, z = (float(v) for v in self.xyz[index])
+        return {
+            "guid": str(self.guids[index]),
+            "name": str(self.names[index]),
+            "description": str(self.descriptions[index]),
+            "x": x,
+            "y": y,
+            "z": z,
+        }
+
+    def records(self, indices):
+        return [self.record(i) for i in indices]
+
+
+def open_store(path, cell_size=DEFAULT_CELL_SIZE):
+    """Load an .npz store, or build one from a dump (cached next to it as <dump>.markers.npz)."""
+    if path.endswith('.npz'):
+        return MarkerStore.load(path)
+    cache_path = os.path.splitext(path)[0] + ".markers.npz"
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        store = MarkerStore.load(cache_path)
+        if store.cell_size == cell_size:
+            return store
+    store = MarkerStore.from_dump(path, cell_size)
+    store.save(cache_path)
+    return store
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build and query a spatial index over extracted markers.")
+    parser.add_argument("store", help="Marker dump JSON/JSONL (indexed and cached as .markers.npz) or an .npz store.")
+    parser.add_argument("--cell-size", type=int, default=DEFAULT_CELL_SIZE, help="Grid cell size in world units. Default: %(default)s")
+    parser.add_argument("--save", metavar="NPZ", help="Write the index to this .npz file.")
+    parser.add_argument("--z", type=float, help="Restrict queries to this floor.")
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument("--bbox", nargs=4, type=float, metavar=("X0", "Y0", "X1", "Y1"), help="Markers inside a box.")
+    query.add_argument("--radius", nargs=3, type=float, metavar=("X", "Y", "R"), help="Markers within R of (X, Y).")
+    query.add_argument("--nearest", nargs=3, type=float, metavar=("X", "Y", "K"), help="K markers nearest to (X, Y).")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        store = open_store(args.store, args.cell_size)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not open marker store {args.store}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Loaded {len(store)} markers on floors {store.floor_list()} in {(time.perf_counter() - start) * 1000:.1f} ms",
+          file=sys.stderr)
+
+    if args.save:
+        store.save(args.save)
+        print(f"Marker store written to {args.save}", file=sys.stderr)
+
+    if args.bbox:
+        result = store.bbox(*args.bbox, z=args.z)
+    elif args.radius:
+        result = store.radius(*args.radius, z=args.z)
+    elif args.nearest:
+        x, y, k = args.nearest
+        result = store.nearest(x, y, int(k), z=args.z)
+    else:
+        sys.exit(0)
+    print(json.dumps(store.records(result), indent=2, ensure_ascii=False))
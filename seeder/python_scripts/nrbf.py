@@ -0,0 +1,680 @@
+"""Streaming reader and writer for .NET BinaryFormatter (MS-NRBF) streams.
+
+The game writes `.minimapdata` files with BinaryFormatter (see POSITION.md).
+This module parses the record stream directly from a file object, one record
+at a time, so the files can be decoded without the .NET runtime, and can
+serialize a decoded (possibly edited) object graph back in the same layout.
+"""
+import io
+import struct
+from collections import deque
+
+# RecordTypeEnumeration (MS-NRBF 2.1.2.1)
+SERIALIZED_STREAM_HEADER = 0
+CLASS_WITH_ID = 1
+SYSTEM_CLASS_WITH_MEMBERS = 2
+CLASS_WITH_MEMBERS = 3
+SYSTEM_CLASS_WITH_MEMBERS_AND_TYPES = 4
+CLASS_WITH_MEMBERS_AND_TYPES = 5
+BINARY_OBJECT_STRING = 6
+BINARY_ARRAY = 7
+MEMBER_PRIMITIVE_TYPED = 8
+MEMBER_REFERENCE = 9
+OBJECT_NULL = 10
+MESSAGE_END = 11
+BINARY_LIBRARY = 12
+OBJECT_NULL_MULTIPLE_256 = 13
+OBJECT_NULL_MULTIPLE = 14
+ARRAY_SINGLE_PRIMITIVE = 15
+ARRAY_SINGLE_OBJECT = 16
+ARRAY_SINGLE_STRING = 17
+
+# BinaryTypeEnumeration (MS-NRBF 2.1.2.2)
+BT_PRIMITIVE = 0
+BT_STRING = 1
+BT_OBJECT = 2
+BT_SYSTEM_CLASS = 3
+BT_CLASS = 4
+BT_OBJECT_ARRAY = 5
+BT_STRING_ARRAY = 6
+BT_PRIMITIVE_ARRAY = 7
+
+# PrimitiveTypeEnumeration (MS-NRBF 2.1.2.3) -> struct format
+PRIMITIVE_FORMATS = {
+    1: '<?',   # Boolean
+    2: '<B',   # Byte
+    6: '<d',   # Double
+    7: '<h',   # Int16
+    8: '<i',   # Int32
+    9: '<q',   # Int64
+    10: '<b',  # SByte
+    11: '<f',  # Single
+    12: '<q',  # TimeSpan (ticks)
+    13: '<Q',  # DateTime (ticks + kind)
+    14: '<H',  # UInt16
+    15: '<I',  # UInt32
+    16: '<Q',  # UInt64
+}
+PT_CHAR = 3
+PT_DECIMAL = 5
+PT_NULL = 17
+PT_STRING = 18
+
+# BinaryArrayTypeEnumeration values that carry lower bounds
+ARRAY_TYPES_WITH_BOUNDS = (3, 4, 5)
+
+
+class NrbfError(Exception):
+    """Raised when the stream is not valid MS-NRBF or uses unsupported records."""
+
+
+class NrbfReference:
+    """Placeholder for a MemberReference until the whole stream has been read."""
+    __slots__ = ('id_ref',)
+
+    def __init__(self, id_ref):
+        self.id_ref = id_ref
+
+
+class NrbfClass:
+    """Class metadata shared by all records that reference it through ClassWithId.
+
+    `library` is the assembly name of the library (None for system classes); the
+    additional info of BT_CLASS member types is likewise (class name, assembly name),
+    so metadata stays meaningful outside the stream it was read from.
+    """
+    __slots__ = ('name', 'member_names', 'member_types', 'library_id', 'library')
+
+    def __init__(self, name, member_names, member_types, library_id, library=None):
+        self.name = name
+        self.member_names = member_names
+        self.member_types = member_types # List of (BinaryTypeEnum, additional info) or None
+        self.library_id = library_id
+        self.library = library
+
+
+class NrbfObject:
+    """A deserialized class instance; `members` maps serialized member name to value."""
+    __slots__ = ('object_id', 'cls', 'members')
+
+    def __init__(self, object_id, cls, members):
+        self.object_id = object_id
+        self.cls = cls
+        self.members = members
+
+    @property
+    def class_name(self):
+        return self.cls.name
+
+    def get(self, name, default=None):
+        """Look a member up by name, ignoring the `DeclaringType+` prefix of inherited fields."""
+        if name in self.members:
+            return self.members[name]
+        suffix = '+' + name
+        for key, value in self.members.items():
+            if key.endswith(suffix):
+                return value
+        return default
+
+    def __repr__(self):
+        return f"NrbfObject({self.cls.name!r}, id={self.object_id})"
+
+
+class NrbfArray:
+    """A deserialized array record (BinaryArray or one of the ArraySingle* records).
+
+    `record_type` is the record it was read from; for a BinaryArray, `layout` holds
+    (BinaryArrayTypeEnum, lengths, lower bounds or None).
+    """
+    __slots__ = ('object_id', 'items', 'element_type', 'record_type', 'layout')
+
+    def __init__(self, object_id, items, element_type=None, record_type=None, layout=None):
+        self.object_id = object_id
+        self.items = items
+        self.element_type = element_type
+        self.record_type = record_type
+        self.layout = layout
+
+    def __repr__(self):
+        return f"NrbfArray(id={self.object_id}, length={len(self.items)})"
+
+
+class _NullRun:
+    """Marker for ObjectNullMultiple records inside arrays."""
+    __slots__ = ('count',)
+
+    def __init__(self, count):
+        self.count = count
+
+
+def encode_string_length(length):
+    """Encode a LengthPrefixedString length as its 7-bit variable-length prefix."""
+    prefix = bytearray()
+    while True:
+        b = length & 0x7F
+        length >>= 7
+        if length:
+            prefix.append(b | 0x80)
+        else:
+            prefix.append(b)
+            return bytes(prefix)
+
+
+class NrbfReader:
+    """Reads MS-NRBF records sequentially from a binary file object.
+
+    With `track_strings`, every LengthPrefixedString read is recorded in
+    `string_spans` as (prefix offset, payload offset, payload length), which is
+    what a byte-level patcher needs to rewrite strings in place.
+    """
+
+    def __init__(self, stream, track_strings=False):
+        self.stream = stream
+        self.offset = 0
+        self.root_id = None
+        self.libraries = {} # library id -> assembly name
+        self.classes = {}   # object id -> NrbfClass (for ClassWithId lookups)
+        self.objects = {}   # object id -> decoded value
+        self.string_spans = [] if track_strings else None
+
+    # --- Primitive readers ---
+    def _read(self, size):
+        data = self.stream.read(size)
+        if len(data) != size:
+            raise NrbfError(f"Unexpected end of stream at offset {self.offset} (wanted {size} bytes)")
+        self.offset += size
+        return data
+
+    def _unpack(self, fmt, size):
+        return struct.unpack(fmt, self._read(size))[0]
+
+    def read_byte(self):
+        return self._read(1)[0]
+
+    def read_int32(self):
+        return self._unpack('<i', 4)
+
+    def read_string(self):
+        """Read a LengthPrefixedString (7-bit encoded length, UTF-8 payload)."""
+        prefix_offset = self.offset
+        length = 0
+        shift = 0
+        while True:
+            b = self.read_byte()
+            length |= (b & 0x7F) << shift
+            if not b & 0x80:
+                break
+            shift += 7
+            if shift > 28:
+                raise NrbfError(f"Invalid string length prefix at offset {self.offset}")
+        if self.string_spans is not None:
+            self.string_spans.append((prefix_offset, self.offset, length))
+        payload_offset = self.offset
+        return self._decode_utf8(self._read(length), payload_offset)
+
+    def _decode_utf8(self, raw, offset):
+        try:
+            return raw.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise NrbfError(f"Invalid UTF-8 at offset {offset + e.start}: {e.reason}") from None
+
+    def read_primitive(self, primitive_type):
+        fmt = PRIMITIVE_FORMATS.get(primitive_type)
+        if fmt is not None:
+            return self._unpack(fmt, struct.calcsize(fmt))
+        if primitive_type == PT_CHAR:
+            first = self._read(1)
+            extra = 0
+            if first[0] >= 0xF0:
+                extra = 3
+            elif first[0] >= 0xE0:
+                extra = 2
+            elif first[0] >= 0xC0:
+                extra = 1
+            return self._decode_utf8(first + self._read(extra), self.offset - 1 - extra)
+        if primitive_type in (PT_DECIMAL, PT_STRING):
+            return self.read_string()
+        if primitive_type == PT_NULL:
+            return None
+        raise NrbfError(f"Unsupported primitive type {primitive_type} at offset {self.offset}")
+
+    # --- Record structure readers ---
+    def _read_class_info(self):
+        object_id = self.read_int32()
+        name = self.read_string()
+        member_count = self.read_int32()
+        member_names = [self.read_string() for _ in range(member_count)]
+        return object_id, name, member_names
+
+    def _read_member_type_info(self, member_count):
+        binary_types = list(self._read(member_count))
+        member_types = []
+        for binary_type in binary_types:
+            if binary_type in (BT_PRIMITIVE, BT_PRIMITIVE_ARRAY):
+                info = self.read_byte()
+            elif binary_type == BT_SYSTEM_CLASS:
+                info = self.read_string()
+            elif binary_type == BT_CLASS:
+                class_name = self.read_string()
+                info = (class_name, self._library_name(self.read_int32()))
+            else:
+                info = None
+            member_types.append((binary_type, info))
+        return member_types
+
+    def _library_name(self, library_id):
+        if library_id not in self.libraries:
+            raise NrbfError(f"Reference to undeclared library {library_id} at offset {self.offset}")
+        return self.libraries[library_id]
+
+    def _read_members(self, object_id, cls):
+        obj = NrbfObject(object_id, cls, {})
+        self.objects[object_id] = obj
+        for index, name in enumerate(cls.member_names):
+            if cls.member_types is not None and cls.member_types[index][0] == BT_PRIMITIVE:
+                obj.members[name] = self.read_primitive(cls.member_types[index][1])
+            else:
+                obj.members[name] = self.read_value()
+        return obj
+
+    def _read_array_items(self, length, element_type=None):
+        items = []
+        while len(items) < length:
+            if element_type is not None and element_type[0] == BT_PRIMITIVE:
+                items.append(self.read_primitive(element_type[1]))
+                continue
+            value = self.read_value()
+            if isinstance(value, _NullRun):
+                items.extend([None] * value.count)
+            else:
+                items.append(value)
+        if len(items) != length:
+            raise NrbfError(f"Array null run overflows declared length {length} at offset {self.offset}")
+        return items
+
+    def read_record(self):
+        """Read one top-level record. Returns (record_type, value)."""
+        record_type = self.read_byte()
+
+        if record_type == SERIALIZED_STREAM_HEADER:
+            self.root_id = self.read_int32()
+            self._read(12) # HeaderId, MajorVersion, MinorVersion
+            return record_type, None
+
+        if record_type == BINARY_LIBRARY:
+            library_id = self.read_int32()
+            self.libraries[library_id] = self.read_string()
+            return record_type, None
+
+        if record_type == MESSAGE_END:
+            return record_type, None
+
+        if record_type == CLASS_WITH_ID:
+            object_id = self.read_int32()
+            metadata_id = self.read_int32()
+            if metadata_id not in self.classes:
+                raise NrbfError(f"ClassWithId references unknown metadata {metadata_id} at offset {self.offset}")
+            cls = self.classes[metadata_id]
+            self.classes[object_id] = cls
+            return record_type, self._read_members(object_id, cls)
+
+        if record_type in (CLASS_WITH_MEMBERS_AND_TYPES, SYSTEM_CLASS_WITH_MEMBERS_AND_TYPES,
+                           CLASS_WITH_MEMBERS, SYSTEM_CLASS_WITH_MEMBERS):
+            object_id, name, member_names = self._read_class_info()
+            member_types = None
+            if record_type in (CLASS_WITH_MEMBERS_AND_TYPES, SYSTEM_CLASS_WITH_MEMBERS_AND_TYPES):
+                member_types = self._read_member_type_info(len(member_names))
+            library_id = library = None
+            if record_type in (CLASS_WITH_MEMBERS_AND_TYPES, CLASS_WITH_MEMBERS):
+                library_id = self.read_int32()
+                library = self._library_name(library_id)
+            cls = NrbfClass(name, member_names, member_types, library_id, library)
+            self.classes[object_id] = cls
+            return record_type, self._read_members(object_id, cls)
+
+        if record_type == BINARY_OBJECT_STRING:
+            object_id = self.read_int32()
+            value = self.read_string()
+            self.objects[object_id] = value
+            return record_type, value
+
+        if record_type == BINARY_ARRAY:
+            object_id = self.read_int32()
+            array_type = self.read_byte()
+            rank = self.read_int32()
+            lengths = [self.read_int32() for _ in range(rank)]
+            lower_bounds = None
+            if array_type in ARRAY_TYPES_WITH_BOUNDS:
+                lower_bounds = [self.read_int32() for _ in range(rank)]
+            element_type = self._read_member_type_info(1)[0]
+            total = 1
+            for length in lengths:
+                total *= length
+            array = NrbfArray(object_id, [], element_type, record_type, (array_type, lengths, lower_bounds))
+            self.objects[object_id] = array
+            array.items = self._read_array_items(total, element_type)
+            return record_type, array
+
+        if record_type == ARRAY_SINGLE_PRIMITIVE:
+            object_id = self.read_int32()
+            length = self.read_int32()
+            primitive_type = self.read_byte()
+            array = NrbfArray(object_id, [], (BT_PRIMITIVE, primitive_type), record_type)
+            self.objects[object_id] = array
+            array.items = [self.read_primitive(primitive_type) for _ in range(length)]
+            return record_type, array
+
+        if record_type in (ARRAY_SINGLE_OBJECT, ARRAY_SINGLE_STRING):
+            object_id = self.read_int32()
+            length = self.read_int32()
+            array = NrbfArray(object_id, [], None, record_type)
+            self.objects[object_id] = array
+            array.items = self._read_array_items(length)
+            return record_type, array
+
+        if record_type == MEMBER_PRIMITIVE_TYPED:
+            return record_type, self.read_primitive(self.read_byte())
+
+        if record_type == MEMBER_REFERENCE:
+            return record_type, NrbfReference(self.read_int32())
+
+        if record_type == OBJECT_NULL:
+            return record_type, None
+
+        if record_type == OBJECT_NULL_MULTIPLE_256:
+            return record_type, _NullRun(self.read_byte())
+
+        if record_type == OBJECT_NULL_MULTIPLE:
+            return record_type, _NullRun(self.read_int32())
+
+        raise NrbfError(f"Unsupported record type {record_type} at offset {self.offset - 1}")
+
+    def read_value(self):
+        """Read a member value record (nested object, string, reference or null)."""
+        record_type, value = self.read_record()
+        if record_type in (SERIALIZED_STREAM_HEADER, MESSAGE_END):
+            raise NrbfError(f"Unexpected record type {record_type} inside object at offset {self.offset - 1}")
+        if record_type == BINARY_LIBRARY:
+            # Libraries may be declared right before the record that first uses them
+            return self.read_value()
+        return value
+
+    def iter_records(self):
+        """Yield (record_type, value) for every top-level record up to MessageEnd."""
+        while True:
+            record_type, value = self.read_record()
+            yield record_type, value
+            if record_type == MESSAGE_END:
+                return
+
+    def resolve_references(self):
+        """Replace every NrbfReference in the decoded graph with the referenced object."""
+        def resolve(value):
+            if isinstance(value, NrbfReference):
+                if value.id_ref not in self.objects:
+                    raise NrbfError(f"Dangling member reference to object {value.id_ref}")
+                return self.objects[value.id_ref]
+            return value
+
+        for value in self.objects.values():
+            if isinstance(value, NrbfObject):
+                for name, member in value.members.items():
+                    value.members[name] = resolve(member)
+            elif isinstance(value, NrbfArray):
+                value.items = [resolve(item) for item in value.items]
+
+
+class NrbfWriter:
+    """Serializes a decoded object graph back to MS-NRBF, in BinaryFormatter's layout.
+
+    Records are written straight to the stream: the root first, then every
+    referenced object in the order it was first referenced. Objects with a
+    negative id (value types such as structs and enums) and strings are written
+    inline. BinaryFormatter only shares a string record between references to the
+    same .NET instance, which in practice means the empty string, so only "" is
+    written once and referenced afterwards. Object ids are reassigned from one
+    counter, so graphs merged from several files never collide.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.next_id = 1
+        self.ids = {}       # id(python object) -> assigned object id
+        self.libraries = {} # assembly name -> library id
+        self.classes = {}   # class key -> metadata object id
+        self.empty_string_id = None
+        self.pending = deque()
+
+    # --- Primitive writers ---
+    def _write(self, data):
+        self.stream.write(data)
+
+    def write_byte(self, value):
+        self._write(bytes((value,)))
+
+    def write_int32(self, value):
+        self._write(struct.pack('<i', value))
+
+    def write_string(self, value):
+        data = value.encode('utf-8')
+        self._write(encode_string_length(len(data)) + data)
+
+    def write_primitive(self, primitive_type, value):
+        fmt = PRIMITIVE_FORMATS.get(primitive_type)
+        if fmt is not None:
+            self._write(struct.pack(fmt, value))
+        elif primitive_type == PT_CHAR:
+            self._write(value.encode('utf-8'))
+        elif primitive_type in (PT_DECIMAL, PT_STRING):
+            self.write_string(value)
+        elif primitive_type != PT_NULL:
+            raise NrbfError(f"Unsupported primitive type {primitive_type}")
+
+    # --- Identity ---
+    def _new_id(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def _reference_id(self, value):
+        """Object id of a reference-type value, queuing it for writing the first time."""
+        key = id(value)
+        if key not in self.ids:
+            self.ids[key] = self._new_id()
+            self.pending.append(value)
+        return self.ids[key]
+
+    def _declare_library(self, name):
+        if name is not None and name not in self.libraries:
+            library_id = self._new_id()
+            self.libraries[name] = library_id
+            self.write_byte(BINARY_LIBRARY)
+            self.write_int32(library_id)
+            self.write_string(name)
+
+    def _declare_type_libraries(self, member_types):
+        for binary_type, info in member_types or ():
+            if binary_type == BT_CLASS:
+                self._declare_library(info[1])
+
+    def _write_member_type_info(self, member_types):
+        self._write(bytes(binary_type for binary_type, _ in member_types))
+        for binary_type, info in member_types:
+            if binary_type in (BT_PRIMITIVE, BT_PRIMITIVE_ARRAY):
+                self.write_byte(info)
+            elif binary_type == BT_SYSTEM_CLASS:
+                self.write_string(info)
+            elif binary_type == BT_CLASS:
+                self.write_string(info[0])
+                self.write_int32(self.libraries[info[1]])
+
+    # --- Records ---
+    def write_value(self, value):
+        """Write a member or array item: null, string, inline value type or reference."""
+        if value is None:
+            self.write_byte(OBJECT_NULL)
+        elif value == '' and self.empty_string_id is not None:
+            self._new_id() # BinaryFormatter still consumes an id for the repeated reference
+            self.write_byte(MEMBER_REFERENCE)
+            self.write_int32(self.empty_string_id)
+        elif isinstance(value, str):
+            object_id = self._new_id()
+            if value == '':
+                self.empty_string_id = object_id
+            self.write_byte(BINARY_OBJECT_STRING)
+            self.write_int32(object_id)
+            self.write_string(value)
+        elif isinstance(value, NrbfObject) and value.object_id < 0:
+            self.write_object(value, -self._new_id())
+        elif isinstance(value, (NrbfObject, NrbfArray)):
+            self.write_byte(MEMBER_REFERENCE)
+            self.write_int32(self._reference_id(value))
+        else:
+            raise NrbfError(f"Cannot write untyped value {value!r}")
+
+    def write_object(self, obj, object_id):
+        cls = obj.cls
+        key = (cls.name, cls.library, tuple(cls.member_names))
+        metadata_id = self.classes.get(key)
+        if metadata_id is not None:
+            self.write_byte(CLASS_WITH_ID)
+            self.write_int32(object_id)
+            self.write_int32(metadata_id)
+        else:
+            self.classes[key] = object_id
+            self._declare_library(cls.library)
+            self._declare_type_libraries(cls.member_types)
+            if cls.member_types is not None:
+                record_type = SYSTEM_CLASS_WITH_MEMBERS_AND_TYPES if cls.library is None else CLASS_WITH_MEMBERS_AND_TYPES
+            else:
+                record_type = SYSTEM_CLASS_WITH_MEMBERS if cls.library is None else CLASS_WITH_MEMBERS
+            self.write_byte(record_type)
+            self.write_int32(object_id)
+            self.write_string(cls.name)
+            self.write_int32(len(cls.member_names))
+            for name in cls.member_names:
+                self.write_string(name)
+            if cls.member_types is not None:
+                self._write_member_type_info(cls.member_types)
+            if cls.library is not None:
+                self.write_int32(self.libraries[cls.library])
+
+        for index, name in enumerate(cls.member_names):
+            value = obj.members[name]
+            if cls.member_types is not None and cls.member_types[index][0] == BT_PRIMITIVE:
+                self.write_primitive(cls.member_types[index][1], value)
+            else:
+                self.write_value(value)
+
+    def _write_array_items(self, items):
+        index = 0
+        while index < len(items):
+            if items[index] is not None:
+                self.write_value(items[index])
+                index += 1
+                continue
+            run = index
+            while run < len(items) and items[run] is None:
+                run += 1
+            count = run - index
+            if count == 1:
+                self.write_byte(OBJECT_NULL)
+            elif count < 256:
+                self.write_byte(OBJECT_NULL_MULTIPLE_256)
+                self.write_byte(count)
+            else:
+                self.write_byte(OBJECT_NULL_MULTIPLE)
+                self.write_int32(count)
+            index = run
+
+    def write_array(self, array, object_id):
+        items = array.items
+        element_type = array.element_type
+        if array.record_type == BINARY_ARRAY:
+            array_type, lengths, lower_bounds = array.layout
+            if len(lengths) == 1:
+                lengths = [len(items)]
+            self._declare_type_libraries([element_type])
+            self.write_byte(BINARY_ARRAY)
+            self.write_int32(object_id)
+            self.write_byte(array_type)
+            self.write_int32(len(lengths))
+            for length in lengths:
+                self.write_int32(length)
+            for bound in lower_bounds or ():
+                self.write_int32(bound)
+            self._write_member_type_info([element_type])
+        elif element_type is not None and element_type[0] == BT_PRIMITIVE:
+            self.write_byte(ARRAY_SINGLE_PRIMITIVE)
+            self.write_int32(object_id)
+            self.write_int32(len(items))
+            self.write_byte(element_type[1])
+            for item in items:
+                self.write_primitive(element_type[1], item)
+            return
+        else:
+            self.write_byte(ARRAY_SINGLE_STRING if array.record_type == ARRAY_SINGLE_STRING else ARRAY_SINGLE_OBJECT)
+            self.write_int32(object_id)
+            self.write_int32(len(items))
+
+        if element_type is not None and element_type[0] == BT_PRIMITIVE:
+            for item in items:
+                self.write_primitive(element_type[1], item)
+        else:
+            self._write_array_items(items)
+
+    def write(self, root):
+        """Write a complete stream (header, all records, MessageEnd) for `root`."""
+        root_id = self._reference_id(root)
+        self.write_byte(SERIALIZED_STREAM_HEADER)
+        self.write_int32(root_id)
+        self.write_int32(-1) # HeaderId
+        self.write_int32(1)  # MajorVersion
+        self.write_int32(0)  # MinorVersion
+        while self.pending:
+            value = self.pending.popleft()
+            object_id = self.ids[id(value)]
+            if isinstance(value, NrbfArray):
+                # The element type's library has to be declared before the array record
+                self.write_array(value, object_id)
+            else:
+                self.write_object(value, object_id)
+        self.write_byte(MESSAGE_END)
+
+
+def load(stream):
+    """Decode a complete NRBF stream and return its root object."""
+    reader = NrbfReader(stream)
+    for _ in reader.iter_records():
+        pass
+    if reader.root_id is None:
+        raise NrbfError("Missing SerializationHeader record")
+    reader.resolve_references()
+    if reader.root_id not in reader.objects:
+        raise NrbfError(f"Root object {reader.root_id} was never defined")
+    return reader.objects[reader.root_id]
+
+
+def string_spans(data):
+    """Parse a complete NRBF buffer and return its (prefix offset, payload offset, length) string spans."""
+    reader = NrbfReader(io.BytesIO(data), track_strings=True)
+    for _ in reader.iter_records():
+        pass
+    return reader.string_spans
+
+
+def load_file(filepath):
+    """Decode the NRBF file at `filepath` and return its root object."""
+    with open(filepath, 'rb') as f:
+        return load(f)
+
+
+def dump(root, stream):
+    """Serialize the object graph under `root` to a binary file object."""
+    NrbfWriter(stream).write(root)
+
+
+def dump_file(root, filepath):
+    """Serialize the object graph under `root` to the file at `filepath`."""
+    with open(filepath, 'wb') as f:
+        dump(root, f)
@@ -7,6 +7,9 @@ import sys
 def parse_coordinates(filename):
     # ... function code ...
 
+# Tile discovery stays on os.listdir + parse_coordinates: the function bodies below
+# are elided in this tree, so the module does not parse. Once they are restored, list
+# tiles with tile_catalog.load_catalog (tools/scripts) as extract_minimap.py does.
 def stitch_layer(extracted_tiles_dir, z_layer, background_image):
     # Find all PNG files in the extracted tiles directory
     files = [f for f in os.listdir(extracted_tiles_dir) if f.endswith('.png')]
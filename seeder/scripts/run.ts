@@ -57,7 +57,11 @@ program
   )
   .option(
     "--skip-cs-extractor",
-    "Skip C# marker extractor and use existing markers_markers_full_dump.json file"
+    "Skip marker extraction and use existing markers_markers_full_dump.json file"
+  )
+  .option(
+    "--use-cs-extractor",
+    "Use the legacy C# marker extractor instead of the Python NRBF decoder"
   )
   .option(
     "--use-s3-files",
@@ -453,9 +457,9 @@ async function runSeeder() {
       seederLogger.info("Skipping Python map processing steps");
     }
 
-    // --- Step 1.5: Run C# Marker Extractor ---
+    // --- Step 1.5: Marker Extraction ---
     // This needs to run before seedMapData, which relies on the generated JSON dump.
-    if (!options.skipCsExtractor) {
+    if (!options.skipCsExtractor && options.useCsExtractor) {
       seederLogger.startStep("C# Marker Extraction");
       try {
         await runCSharpMarkerExtractor();
@@ -464,6 +468,20 @@ async function runSeeder() {
         seederLogger.error("C# marker extraction failed", error);
         return 1; // Exit with error if marker extraction fails (critical)
       }
+    } else if (!options.skipCsExtractor) {
+      seederLogger.startStep("Marker Extraction");
+      try {
+        // Decodes the BinaryFormatter stream directly, no dotnet build needed
+        await runPythonScript("decode_markers.py", [
+          inputMarkerFile,
+          "--output",
+          finalMarkerJson,
+        ]);
+        seederLogger.completeStep("Marker Extraction");
+      } catch (error) {
+        seederLogger.error("Marker extraction failed", error);
+        return 1; // Exit with error if marker extraction fails (critical)
+      }
     } else {
       seederLogger.startStep("Checking for existing markers JSON");
       try {
@@ -1,7 +1,10 @@
 import os
 from PIL import Image
-import sys
 import time
+import argparse
+from collections import namedtuple
+import numpy as np
+from terrain_cache import load_terrain
 # Make sure matplotlib is installed: pip install matplotlib
 try:
     import matplotlib.pyplot as plt
@@ -413,6 +416,283 @@ Calculated Overall Offset: ({final_offset_x}, {final_offset_y})""")
 
     return (final_offset_x, final_offset_y)
 
+# --- Headless FFT Alignment ---
+# Result of align_images: offset of the full composite on the terrain, the masked
+# NCC score at that offset (-1..1), its margin over the best distinct runner-up
+# (0 = ambiguous) and where the patch was taken from the composite.
+Alignment = namedtuple('Alignment', 'offset score confidence patch_origin')
+
+LUMINANCE = (0.299, 0.587, 0.114)
+MIN_VARIANCE = 1e-3 # Per-pixel grey variance below which a terrain window counts as flat
+MIN_PYRAMID_PATCH = 12 # Smallest patch side (px) the coarsest pyramid level may shrink the patch to
+TOP_K = 5 # Candidates kept per pyramid level
+REFINE_RADIUS = 2 # Search radius (px) around a candidate at each finer level
+LUMINANCE_BAND = 512 # Rows of the terrain converted at a time when building the pyramid
+
+
+def to_luminance(rgba):
+    """(H, W) float64 grey values of an RGB(A) array, built one channel at a time."""
+    grey = np.zeros(rgba.shape[:2], dtype=np.float64)
+    for channel, weight in enumerate(LUMINANCE):
+        grey += rgba[..., channel] * weight
+    return grey
+
+
+def alpha_bbox(alpha):
+    """(x, y, w, h) of the pixels with alpha > 0, or None if there are none."""
+    rows = np.flatnonzero(alpha.any(axis=1))
+    cols = np.flatnonzero(alpha.any(axis=0))
+    if len(rows) == 0:
+        return None
+    return int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1)
+
+
+def _fast_len(n):
+    """Smallest 2^a * 3^b * 5^c >= n; FFTs of such sizes are fast."""
+    best = 1 << (n - 1).bit_length()
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            p = p35
+            while p < n:
+                p *= 2
+            best = min(best, p)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def masked_ncc(image, template, mask):
+    """Masked normalized cross-correlation of `template` at every offset where it fits inside `image`.
+
+    Only pixels where `mask` is set take part, on both sides: the template and
+    each image window are normalised by their mean and variance under the mask.
+    All correlations are computed with FFTs, so every offset is scored at once.
+    Returns a (H - h + 1, W - w + 1) array of scores in [-1, 1] indexed by the
+    (y, x) of the template's top-left corner; flat image windows score 0.
+
+    Memory: besides `image`, the peak is about six float64 planes of the
+    FFT-padded image size (two image spectra, a kernel spectrum, a padded
+    inverse transform and the valid-region results), so a full resolution
+    search of a large terrain needs several GB; see pyramid_search.
+    """
+    image = np.asarray(image, dtype=np.float64)
+    mask = np.asarray(mask, dtype=bool)
+    height, width = image.shape
+    t_height, t_width = mask.shape
+    count = int(mask.sum())
+    if count == 0 or t_height > height or t_width > width:
+        raise ValueError("Template is empty or larger than the image.")
+
+    template = np.where(mask, template - np.asarray(template, dtype=np.float64)[mask].mean(), 0.0)
+    template_energy = float((template * template).sum())
+    shape = (_fast_len(height), _fast_len(width))
+    valid = (slice(0, height - t_height + 1), slice(0, width - t_width + 1))
+
+    def correlate(spectrum, kernel):
+        """Valid region of the correlation, copied out so the padded inverse transform is freed."""
+        product = np.fft.rfft2(kernel, shape)
+        np.conjugate(product, out=product)
+        product *= spectrum
+        return np.fft.irfft2(product, shape)[valid].copy()
+
+    shifted = image - image.mean() # Keeps the local variance below well conditioned
+    spectrum = np.fft.rfft2(shifted, shape)
+    np.square(shifted, out=shifted)
+    sq_spectrum = np.fft.rfft2(shifted, shape)
+    del shifted
+
+    mask_kernel = mask.astype(np.float64)
+    window_sum = correlate(spectrum, mask_kernel)
+    numerator = correlate(spectrum, template) # Template has zero mean under the mask
+    del spectrum
+    variance = correlate(sq_spectrum, mask_kernel)
+    del sq_spectrum
+    window_sum *= window_sum
+    window_sum /= count
+    variance -= window_sum
+    del window_sum
+
+    flat = variance <= MIN_VARIANCE * count
+    variance[flat] = 1.0
+    variance *= max(template_energy, 1e-12)
+    np.sqrt(variance, out=variance)
+    numerator /= variance
+    numerator[flat] = 0.0
+    return np.clip(numerator, -1.0, 1.0, out=numerator)
+
+
+def top_peaks(scores, count, radius):
+    """Up to `count` (score, (x, y)) maxima of a score map, at least `radius` (rx, ry) apart, best first."""
+    scores = np.array(scores, dtype=np.float64)
+    peaks = []
+    for _ in range(count):
+        y, x = np.unravel_index(np.argmax(scores), scores.shape)
+        if not np.isfinite(scores[y, x]):
+            break
+        peaks.append((float(scores[y, x]), (int(x), int(y))))
+        scores[max(0, y - radius[1]):y + radius[1] + 1, max(0, x - radius[0]):x + radius[0] + 1] = -np.inf
+    return peaks
+
+
+def select_patch(composite_rgba, patch_size):
+    """Patch origin (x, y) and size at the center of the composite's non-transparent area, or None."""
+    bbox = alpha_bbox(composite_rgba[..., 3])
+    if bbox is None:
+        return None
+    bb_x, bb_y, bb_w, bb_h = bbox
+    patch_w, patch_h = min(patch_size[0], bb_w), min(patch_size[1], bb_h)
+    return (bb_x + (bb_w - patch_w) // 2, bb_y + (bb_h - patch_h) // 2), (patch_w, patch_h)
+
+
+def _halve(grey):
+    """2x2 mean of a 2D array (a trailing odd row/column is dropped)."""
+    g = grey[:grey.shape[0] // 2 * 2, :grey.shape[1] // 2 * 2]
+    return (g[0::2, 0::2] + g[1::2, 0::2] + g[0::2, 1::2] + g[1::2, 1::2]) / 4
+
+
+def _halve_masked(grey, mask):
+    """Halve a template and its mask: values averaged over masked pixels, kept where at least half are masked."""
+    weight = _halve(mask.astype(np.float64))
+    total = _halve(np.where(mask, grey, 0.0))
+    return np.where(weight > 0, total / np.maximum(weight, 1e-12), 0.0), weight >= 0.5
+
+
+def luminance_pyramid(rgba, levels):
+    """[None, level 1, ..., level `levels`] grey images, each half the size of the previous one.
+
+    Level 1 is built from row bands of `rgba`, so the full resolution grey image
+    is never held in memory; level 0 is read from `rgba` when needed.
+    """
+    height = rgba.shape[0] // 2 * 2
+    first = np.empty((height // 2, rgba.shape[1] // 2), dtype=np.float64)
+    for top in range(0, height, LUMINANCE_BAND):
+        first[top // 2:(top + LUMINANCE_BAND) // 2] = _halve(to_luminance(rgba[top:min(top + LUMINANCE_BAND, height)]))
+    pyramid = [None, first]
+    for _ in range(levels - 1):
+        pyramid.append(_halve(pyramid[-1]))
+    return pyramid
+
+
+def auto_levels(patch_size):
+    """Number of halvings that keep the smaller patch side at least MIN_PYRAMID_PATCH pixels."""
+    levels = 0
+    while min(patch_size) >> (levels + 1) >= MIN_PYRAMID_PATCH:
+        levels += 1
+    return levels
+
+
+def _distinct(peaks, radius, count):
+    """Best-first `peaks` with any peak within `radius` of a better one dropped, at most `count`."""
+    kept = []
+    for score, (x, y) in sorted(peaks, key=lambda peak: peak[0], reverse=True):
+        if all(abs(x - kx) > radius[0] or abs(y - ky) > radius[1] for _, (kx, ky) in kept):
+            kept.append((score, (x, y)))
+            if len(kept) == count:
+                break
+    return kept
+
+
+def pyramid_search(terrain_rgba, template, mask, levels, top_k=TOP_K):
+    """Coarse-to-fine masked NCC search of a grey template over an RGBA terrain.
+
+    The template is scored at every offset only on the coarsest of `levels`
+    halvings (fewer if the mask thins out); the top_k distinct peaks there are
+    each refined within REFINE_RADIUS pixels at every finer level, keeping the
+    top_k per level so a wrong coarse maximum cannot hide the true one. With
+    levels=0 every full resolution offset is scored. Returns the distinct
+    (score, (x, y)) candidates at full resolution, best first.
+    """
+    templates = [(template, mask)]
+    for _ in range(levels):
+        halved = _halve_masked(*templates[-1])
+        if halved[1].sum() < MIN_PYRAMID_PATCH ** 2 // 2:
+            break # Too few masked pixels left to match reliably
+        templates.append(halved)
+    levels = len(templates) - 1
+    terrain_levels = luminance_pyramid(terrain_rgba, levels) if levels else [to_luminance(terrain_rgba)]
+
+    coarse_template, coarse_mask = templates[levels]
+    radius = (coarse_mask.shape[1] // 2, coarse_mask.shape[0] // 2)
+    scores = masked_ncc(terrain_levels[levels], coarse_template, coarse_mask)
+    candidates = top_peaks(scores, top_k, radius)
+
+    for level in range(levels - 1, -1, -1):
+        level_template, level_mask = templates[level]
+        t_height, t_width = level_mask.shape
+        height, width = terrain_rgba.shape[:2] if level == 0 else terrain_levels[level].shape
+        refined = []
+        for _, (x, y) in candidates:
+            x0 = min(max(2 * x - REFINE_RADIUS, 0), width - t_width)
+            y0 = min(max(2 * y - REFINE_RADIUS, 0), height - t_height)
+            x1 = min(2 * x + 1 + REFINE_RADIUS, width - t_width)
+            y1 = min(2 * y + 1 + REFINE_RADIUS, height - t_height)
+            box = (slice(y0, y1 + t_height), slice(x0, x1 + t_width))
+            region = to_luminance(terrain_rgba[box]) if level == 0 else terrain_levels[level][box]
+            window = masked_ncc(region, level_template, level_mask)
+            dy, dx = np.unravel_index(np.argmax(window), window.shape)
+            refined.append((float(window[dy, dx]), (int(x0 + dx), int(y0 + dy))))
+        candidates = _distinct(refined, (t_width // 2, t_height // 2), top_k)
+    return candidates
+
+
+def align_images(terrain_rgba, composite_rgba, patch_size=(100, 100), levels=None, top_k=TOP_K):
+    """Offset of the composite on the terrain from a patch at the center of its content. Returns an Alignment or None.
+
+    The patch is matched with masked_ncc, the transparent patch pixels masked
+    out, coarse-to-fine over `levels` pyramid levels (default: auto_levels; 0
+    scores every full resolution offset) with pyramid_search. The
+    confidence is the margin of the best score over the best score at least
+    half a patch away.
+    """
+    selection = select_patch(composite_rgba, patch_size)
+    if selection is None:
+        return None
+    (patch_x, patch_y), (patch_w, patch_h) = selection
+    patch = composite_rgba[patch_y:patch_y + patch_h, patch_x:patch_x + patch_w]
+    mask = patch[..., 3] > 0
+
+    if levels is None:
+        levels = auto_levels((patch_w, patch_h))
+    peaks = pyramid_search(terrain_rgba, to_luminance(patch), mask, levels, max(top_k, 2))
+    best_score, (match_x, match_y) = peaks[0]
+    runner_up = peaks[1][0] if len(peaks) > 1 else -1.0
+    return Alignment((match_x - patch_x, match_y - patch_y), best_score, best_score - runner_up, (patch_x, patch_y))
+
+
+def align_maps(terrain_img_path, composite_img_path, patch_size=(100, 100), cache_dir=None, levels=None, top_k=TOP_K):
+    """Headless alignment of composite_img on terrain_img (see align_images). The terrain is read through terrain_cache."""
+    try:
+        print(f"Loading terrain image: {terrain_img_path}")
+        terrain = load_terrain(terrain_img_path, cache_dir)
+        print(f"Loading composite image: {composite_img_path}")
+        with Image.open(composite_img_path) as img:
+            composite = np.asarray(img.convert('RGBA'))
+    except (OSError, ValueError) as e:
+        print(f"Error loading image: {e}")
+        return None
+    print(f"Terrain dimensions: {terrain.shape[1]}x{terrain.shape[0]}")
+    print(f"Composite dimensions: {composite.shape[1]}x{composite.shape[0]}")
+
+    start = time.time()
+    try:
+        alignment = align_images(terrain, composite, patch_size, levels, top_k)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    if alignment is None:
+        print("Error: Composite image is fully transparent.")
+        return None
+
+    print("-" * 30)
+    print(f"Patch location within composite image: {alignment.patch_origin}")
+    print(f"Masked NCC score: {alignment.score:.4f} (confidence margin {alignment.confidence:.4f})")
+    print(f"Search finished in {time.time() - start:.2f} seconds.")
+    print(f"==> Calculated offset for composite.png on terrain.png: {alignment.offset} <==")
+    print("-" * 30)
+    return alignment
+
 if __name__ == '__main__':
     # --- Configuration ---
     script_dir = os.path.dirname(os.path.abspath(__file__)) # Use absolute path for reliability
@@ -423,23 +703,19 @@ if __name__ == '__main__':
     default_terrain_path = os.path.join(workspace_root, 'terrain.png')
     default_composite_path = os.path.join(script_dir, 'minimap_data', 'extracted', 'stitched', 'composite.png')
     
-    terrain_image_path = default_terrain_path
-    composite_image_path = default_composite_path
-    
-    # Check if file paths were provided as command-line arguments
-    if len(sys.argv) == 3:
-        terrain_image_path = sys.argv[1]
-        composite_image_path = sys.argv[2]
-        print(f"Using command line arguments for paths:")
-    elif len(sys.argv) != 1:
-        print("\nUsage: python align_maps.py [<path_to_terrain.png> <path_to_composite.png>]")
-        print("If no paths are provided, defaults will be used:")
-        print(f"  Default Terrain: {default_terrain_path}")
-        print(f"  Default Composite: {default_composite_path}\n")
-        sys.exit(1)
-    else:
-        print(f"Using default paths:")
-        print(f"(You can override by providing paths as command line arguments)")
+    parser = argparse.ArgumentParser(description='Find the offset of the stitched composite on the terrain image.')
+    parser.add_argument('terrain', nargs='?', default=default_terrain_path, help='Terrain image. Default: %(default)s')
+    parser.add_argument('composite', nargs='?', default=default_composite_path, help='Composite image. Default: %(default)s')
+    parser.add_argument('--patch-size', type=int, nargs=2, default=(100, 100), metavar=('W', 'H'),
+                        help='Size of the composite patch that is matched. Default: 100 100')
+    parser.add_argument('--cache-dir', default=None, help='Directory of the decoded terrain raster cache. Default: terrain_cache/ next to the terrain image')
+    parser.add_argument('--levels', type=int, default=None,
+                        help=f'Pyramid levels of the coarse-to-fine search; 0 scores every full resolution offset. Default: patch side >= {MIN_PYRAMID_PATCH}px at the coarsest level')
+    parser.add_argument('--top-k', type=int, default=TOP_K, help='Candidates kept per pyramid level. Default: %(default)s')
+    parser.add_argument('--visual', action='store_true', help='Use the interactive matplotlib SSD search instead of the FFT engine (slow).')
+    args = parser.parse_args()
+    terrain_image_path = args.terrain
+    composite_image_path = args.composite
 
     print(f"  Terrain: {terrain_image_path}")
     print(f"  Composite: {composite_image_path}")
@@ -458,6 +734,9 @@ if __name__ == '__main__':
         # You might want to adjust the patch size depending on image features
         # A larger patch might be more robust but slower.
         # A smaller patch is faster but might match in the wrong place if the pattern repeats.
-        find_best_match(terrain_image_path, composite_image_path, patch_size=(100, 100))
+        if args.visual:
+            find_best_match(terrain_image_path, composite_image_path, patch_size=tuple(args.patch_size))
+        else:
+            align_maps(terrain_image_path, composite_image_path, tuple(args.patch_size), args.cache_dir, args.levels, args.top_k)
     else:
-        print("\nPlease correct the image paths and try again.") 
\ No newline at end of file
+        print("\nPlease correct the image paths and try again.")
@@ -1,6 +1,8 @@
 import os
 import struct
 
+from profile_binary import profile_bytes, format_report, repeated_prefix_counts
+
 def analyze_file(filepath):
     print(f"Analyzing file: {filepath}")
     print("-" * 50)
@@ -39,12 +41,9 @@ def analyze_file(filepath):
         print("Looking for repeating patterns...")
         f.seek(0)
         data = f.read()
-        for i in range(4, 20):
-            if len(data) > i:
-                pattern = data[:i]
-                count = data.count(pattern)
-                if count > 1:
-                    print(f"Found repeating pattern of length {i} (appears {count} times)")
+        for i, count in repeated_prefix_counts(data, 4, 19).items():
+            if count > 1:
+                print(f"Found repeating pattern of length {i} (appears {count} times)")
         
         # Look for potential image data
         print("\nLooking for potential image data...")
@@ -60,12 +59,14 @@ def analyze_file(filepath):
         
         # Try to find where the actual image data might start
         print("\nLooking for potential image data start...")
-        # Look for large sections of non-zero data
+        # Look for large sections of non-zero data (1 KB windows, one NumPy pass)
         chunk_size = 1024
-        for i in range(0, len(data), chunk_size):
-            chunk = data[i:i+chunk_size]
-            if sum(1 for b in chunk if b != 0) > chunk_size * 0.8:  # If more than 80% non-zero
-                print(f"Found potential image data starting around byte {i}")
+        profile = profile_bytes(data, window=chunk_size, step=chunk_size)
+        for i in profile['offsets'][profile['nonzero'] > 0.8].tolist():  # If more than 80% non-zero
+            print(f"Found potential image data starting around byte {i}")
+
+        print("\nByte profile:")
+        print(format_report(profile, os.path.basename(filepath)))
 
 if __name__ == '__main__':
     # Get the directory containing the minimap files
@@ -3,6 +3,105 @@ import sys
 import struct
 import re
 from binascii import hexlify
+import numpy as np
+
+# Shared GUID locator lives with the seeder's marker scripts
+workspace_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+sys.path.insert(0, os.path.join(workspace_root, 'seeder', 'python_scripts'))
+from guid_index import index_guids, default_cache_dir
+from binary_diff import diff_bytes, format_ops, DEFAULT_BLOCK_SIZE
+
+COORD_LIMIT = 10000.0 # |value| bound for a plausible world coordinate
+MIN_COORD_MAGNITUDE = 1e-3 # Smaller non-zero floats are almost always misread bytes
+
+def scan_float_candidates(data, limit=COORD_LIMIT, min_magnitude=MIN_COORD_MAGNITUDE):
+    """Find plausible <f4 coordinate pairs and triplets anywhere in the buffer.
+
+    The buffer is viewed as float32 at byte offsets 0-3, so unaligned values are
+    found too, and every (x, y) and (x, y, z) window is filtered in one vectorized
+    pass. Returns {'pairs': (offsets, xy), 'triplets': (offsets, xyz)}, sorted by offset.
+    """
+    results = {}
+    for width, name in ((2, 'pairs'), (3, 'triplets')):
+        all_offsets, all_values = [], []
+        for align in range(4):
+            count = (len(data) - align) // 4
+            if count < width:
+                continue
+            floats = np.frombuffer(data, dtype='<f4', count=count, offset=align)
+            with np.errstate(invalid='ignore'):
+                magnitude = np.abs(floats)
+                plausible = (magnitude < limit) & ((floats == 0) | (magnitude >= min_magnitude))
+            n = count - width + 1
+            mask = np.ones(n, dtype=bool)
+            large = np.zeros(n, dtype=bool)
+            for k in range(width):
+                mask &= plausible[k:k + n]
+            for k in range(2): # x or y must be more than 1 unit from the origin
+                large |= magnitude[k:k + n] > 1
+            hits = np.flatnonzero(mask & large)
+            all_offsets.append(align + 4 * hits)
+            all_values.append(np.stack([floats[hits + k] for k in range(width)], axis=1))
+        if all_offsets:
+            offsets = np.concatenate(all_offsets)
+            values = np.concatenate(all_values)
+            order = np.argsort(offsets, kind='stable')
+            results[name] = (offsets[order], values[order])
+        else:
+            results[name] = (np.empty(0, dtype=np.int64), np.empty((0, width), dtype=np.float32))
+    return results
+
+def suggest_record_strides(offsets, max_lookahead=8, top=5, min_run=3, min_stride=8):
+    """Cluster hit offsets by the stride between them to suggest fixed-size record layouts.
+
+    Candidate strides are the most common distances from each hit to its next
+    few hits. For each, hits that are exactly one stride apart are chained into
+    runs. Returns dicts (stride, links, runs, records, longest_start, longest_records), best first.
+    """
+    offsets = np.unique(np.asarray(offsets, dtype=np.int64))
+    if len(offsets) < min_run:
+        return []
+    distances = np.concatenate([offsets[k:] - offsets[:-k] for k in range(1, min(max_lookahead, len(offsets) - 1) + 1)])
+    distances = distances[distances >= min_stride]
+    if len(distances) == 0:
+        return []
+    strides, counts = np.unique(distances, return_counts=True)
+    candidates = strides[np.argsort(counts, kind='stable')[::-1][:top * 2]]
+
+    suggestions = []
+    for stride in candidates.tolist():
+        # Members of a run have a neighbour one stride before or after them
+        member = np.zeros(len(offsets), dtype=bool)
+        for target in (offsets + stride, offsets - stride):
+            member |= offsets[np.clip(np.searchsorted(offsets, target), 0, len(offsets) - 1)] == target
+        chained = offsets[member]
+        if len(chained) < min_run:
+            continue
+        # Sort by residue, then offset: consecutive entries one stride apart share a run
+        order = np.lexsort((chained, chained % stride))
+        chained = chained[order]
+        breaks = np.flatnonzero(np.diff(chained) != stride) + 1
+        starts = np.concatenate([[0], breaks])
+        lengths = np.diff(np.concatenate([starts, [len(chained)]]))
+        keep = lengths >= min_run
+        if not keep.any():
+            continue
+        best = int(np.argmax(np.where(keep, lengths, 0)))
+        suggestions.append({
+            'stride': stride,
+            'links': int((lengths[keep] - 1).sum()), # Hits followed by another exactly one stride later
+            'runs': int(keep.sum()),
+            'records': int(lengths[keep].sum()),
+            'longest_start': int(chained[starts[best]]),
+            'longest_records': int(lengths[best]),
+        })
+    # Links favour long runs over many short ones made of unrelated hits
+    suggestions.sort(key=lambda s: (s['links'], s['longest_records']), reverse=True)
+    # A multiple of a stride that explains (nearly) as many links is the same layout
+    fundamental = [s for s in suggestions
+                   if not any(t['stride'] < s['stride'] and s['stride'] % t['stride'] == 0
+                              and t['links'] >= 0.9 * s['links'] for t in suggestions)]
+    return fundamental[:top]
 
 def analyze_binary_file(filepath):
     """Analyze a binary file to identify player IDs and data structure"""
@@ -31,17 +130,15 @@ def analyze_binary_file(filepath):
             possible_length = struct.unpack("<I", length_bytes)[0]
             print(f"  Preceding 4 bytes: {hexlify(length_bytes).decode()} (as uint32: {possible_length})")
     
-    # Look for UUID patterns using regex
+    # Look for UUID patterns (one shared scan finds both formats)
     print("\nUUID Search:")
-    # Convert binary to text with Latin-1 encoding to preserve byte values
-    text_data = data.decode('latin-1')
-    uuid_pattern = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
-    uuids = re.findall(uuid_pattern, text_data, re.IGNORECASE)
-    
-    if uuids:
-        print(f"Found {len(uuids)} potential UUIDs:")
-        for i, uuid in enumerate(uuids):
-            uuid_pos = text_data.find(uuid)
+    guids = index_guids(data, default_cache_dir(filepath))
+    uuids = []
+    
+    if len(guids.hyphenated):
+        print(f"Found {len(guids.hyphenated)} potential UUIDs:")
+        for i, (uuid_pos, uuid) in enumerate(guids.hyphenated_guids()):
+            uuids.append(uuid)
             print(f"  {i+1}. {uuid} at position {uuid_pos}")
             
             # Show surrounding bytes for context
@@ -53,41 +150,41 @@ def analyze_binary_file(filepath):
         print("No UUIDs found in standard format")
         
         # Try looking for non-hyphenated UUIDs
-        uuid_no_hyphens = r'[0-9a-f]{32}'
-        uuids_nh = re.findall(uuid_no_hyphens, text_data, re.IGNORECASE)
-        if uuids_nh:
-            print(f"Found {len(uuids_nh)} potential non-hyphenated UUIDs:")
-            for i, uuid in enumerate(uuids_nh[:5]):  # Show only first 5 to avoid spam
-                uuid_pos = text_data.find(uuid)
+        if len(guids.plain):
+            print(f"Found {len(guids.plain)} potential non-hyphenated UUIDs:")
+            for i, (uuid_pos, uuid) in enumerate(guids.plain_guids()):
+                if i >= 5:  # Show only first 5 to avoid spam
+                    break
                 print(f"  {i+1}. {uuid} at position {uuid_pos}")
     
     # Look for potential coordinates - scan for float pairs that could be coordinates
     print("\nPotential Coordinates (x,y pairs):")
-    coord_count = 0
-    found_coords = []
-    
-    # Only scan a portion of the file to avoid too many false positives
-    scan_size = min(len(data), 10000)
-    for i in range(0, scan_size - 8, 4):
-        try:
-            # Look for pairs of floats with reasonable values
-            x = struct.unpack("<f", data[i:i+4])[0]
-            y = struct.unpack("<f", data[i+4:i+8])[0]
-            
-            # Filter for reasonable coordinate ranges
-            if -10000 < x < 10000 and -10000 < y < 10000 and (abs(x) > 1 or abs(y) > 1):
-                found_coords.append((i, x, y))
-                coord_count += 1
-                
-                # Only show first 10 coordinates
-                if coord_count <= 10:
-                    print(f"  Position {i}: ({x:.2f}, {y:.2f})")
-        except:
-            pass
+    # Whole file, every byte alignment
+    candidates = scan_float_candidates(data)
+    pair_offsets, pairs = candidates['pairs']
+    found_coords = [(int(i), float(x), float(y)) for i, (x, y) in zip(pair_offsets, pairs)]
+    coord_count = len(found_coords)
+    
+    # Only show first 10 coordinates
+    for i, x, y in found_coords[:10]:
+        print(f"  Position {i}: ({x:.2f}, {y:.2f})")
     
     if coord_count > 10:
         print(f"  ... and {coord_count - 10} more coordinate pairs")
     
+    triplet_offsets, triplets = candidates['triplets']
+    print(f"\nPotential Coordinates (x,y,z triplets): {len(triplet_offsets)}")
+    for i, (x, y, z) in list(zip(triplet_offsets.tolist(), triplets))[:5]:
+        print(f"  Position {i}: ({x:.2f}, {y:.2f}, {z:.2f})")
+    
+    print("\nSuggested record strides (from triplet offsets):")
+    strides = suggest_record_strides(triplet_offsets)
+    for s in strides:
+        print(f"  stride {s['stride']:5d} bytes: {s['records']} records in {s['runs']} runs, "
+              f"longest {s['longest_records']} records from position {s['longest_start']}")
+    if not strides:
+        print("  No repeating stride found")
+    
     # Look for text strings that might be marker names or descriptions
     print("\nPotential Marker Text:")
     strings = re.findall(b'[ -~]{5,}', data)  # Find printable ASCII strings of 5+ chars
@@ -115,10 +212,12 @@ def analyze_binary_file(filepath):
         'file_size': len(data),
         'uuids': uuids,
         'coordinates': found_coords,
+        'triplets': list(zip(triplet_offsets.tolist(), triplets.tolist())),
+        'strides': strides,
         'strings': list(unique_strings)
     }
 
-def compare_files(file1, file2):
+def compare_files(file1, file2, block_size=DEFAULT_BLOCK_SIZE):
     """Compare two files to identify differences"""
     print("\nComparing Files:")
     print("=" * 60)
@@ -131,13 +230,10 @@ def compare_files(file1, file2):
     print(f"File 2: {os.path.basename(file2)} - {len(data2)} bytes")
     
     # Find length of common prefix
-    common_len = 0
     min_len = min(len(data1), len(data2))
-    
-    for i in range(min_len):
-        if data1[i] != data2[i]:
-            common_len = i
-            break
+    mismatch = np.flatnonzero(np.frombuffer(data1, dtype=np.uint8, count=min_len) !=
+                              np.frombuffer(data2, dtype=np.uint8, count=min_len))
+    common_len = int(mismatch[0]) if len(mismatch) else min_len
     
     print(f"\nCommon prefix length: {common_len} bytes")
     
@@ -148,6 +244,14 @@ def compare_files(file1, file2):
         print(f"\nFirst difference at position {common_len}:")
         print(f"File 1: {hexlify(data1[common_len:common_len+20]).decode()}")
         print(f"File 2: {hexlify(data2[common_len:common_len+20]).decode()}")
+    
+    # Structural differences past the first one (aligned and shifted matching regions)
+    matches, ops = diff_bytes(data1, data2, block_size)
+    matched = sum(length for _, _, length in matches)
+    print(f"\n{matched} bytes of file 2 match file 1 in {len(matches)} regions; {len(ops)} edit operations:")
+    if ops:
+        print(format_ops(ops))
+    return ops
 
 if __name__ == "__main__":
     # Define file paths
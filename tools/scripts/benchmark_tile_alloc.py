@@ -0,0 +1,75 @@
+# tools/scripts/benchmark_tile_alloc.py
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from PIL import Image
+from terrain_cache import load_terrain, clip_box, tile_image
+
+
+def legacy_tile(raster, left, top, width, height):
+    """The previous per-tile path: a transparent Image.new, a crop copy and a paste."""
+    tile = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    l, t, r, b = clip_box(raster, left, top, left + width, top + height)
+    if r > l and b > t:
+        tile.paste(Image.fromarray(raster[t:b, l:r], 'RGBA'), (l - left, t - top))
+    return tile
+
+
+def tile_boxes(raster, tile_size, offset):
+    """Top-left corners of a tile grid over the raster, shifted by `offset` so the grid has edge tiles."""
+    height, width = raster.shape[:2]
+    for top in range(-offset, height, tile_size):
+        for left in range(-offset, width, tile_size):
+            yield left, top
+
+
+def measure(name, make_tile, raster, boxes, tile_size):
+    """Run make_tile over every box, forcing the pixels, and print allocation and time figures."""
+    if not boxes:
+        return
+    before = Image.core.get_stats()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for left, top in boxes:
+        make_tile(raster, left, top, tile_size, tile_size).load()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    after = Image.core.get_stats()
+    print(f"{name:<8} {elapsed * 1000:9.1f} ms  PIL images {after['new_count'] - before['new_count']:6d}  "
+          f"PIL blocks {after['allocated_blocks'] - before['allocated_blocks']:6d}  "
+          f"Python peak {peak / 2**20:8.2f} MiB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare per-tile allocations of the old and view-based terrain tile paths.')
+    parser.add_argument('-t', '--terrain', help='Terrain image to slice (default: a random 4096x4096 raster).')
+    parser.add_argument('--tile-size', type=int, default=1000, help='Tile width and height (default: %(default)s).')
+    parser.add_argument('--offset', type=int, default=300, help='Grid offset in pixels, producing edge tiles (default: %(default)s).')
+    args = parser.parse_args()
+
+    if args.terrain:
+        try:
+            raster = load_terrain(args.terrain)
+        except OSError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'terrain.npy')
+        np.save(path, np.random.default_rng(0).integers(0, 256, (4096, 4096, 4), dtype=np.uint8))
+        raster = np.load(path, mmap_mode='r')
+
+    height, width = raster.shape[:2]
+    interior, edge = [], []
+    for left, top in tile_boxes(raster, args.tile_size, args.offset):
+        inside = left >= 0 and top >= 0 and left + args.tile_size <= width and top + args.tile_size <= height
+        (interior if inside else edge).append((left, top))
+    print(f"Raster {width}x{height}, tiles of {args.tile_size}px")
+    for label, boxes in (('Interior', interior), ('Edge', edge)):
+        print(f"{label} tiles: {len(boxes)}")
+        measure('legacy', legacy_tile, raster, boxes, args.tile_size)
+        measure('views', tile_image, raster, boxes, args.tile_size)
@@ -0,0 +1,243 @@
+# tools/scripts/binary_diff.py
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = 16 # Minimum length of a matching region
+HASH_CHUNK = 1 << 20 # New-file offsets hashed per pass
+FILTER_BITS = 24 # Size (as a power of two) of the hash presence filter
+_EXTEND_STEP = 4096
+
+# Polynomial hash sum(b[k] * P**k) mod 2**64; P is odd, so it has an inverse and a
+# window hash is a prefix-sum difference times P**-i (uint64 arithmetic wraps for free)
+_P = 0x100000001B3
+_P_INV = pow(_P, -1, 1 << 64)
+
+
+def _powers(base, count):
+    powers = np.full(count, base, dtype=np.uint64)
+    powers[0] = 1
+    return np.cumprod(powers, dtype=np.uint64)
+
+
+def block_hashes(arr, block_size):
+    """Hashes of the non-overlapping blocks of `arr` (the last partial block is ignored)."""
+    count = len(arr) // block_size
+    blocks = arr[:count * block_size].reshape(count, block_size).astype(np.uint64)
+    return (blocks * _powers(_P, block_size)).sum(axis=1, dtype=np.uint64)
+
+
+def rolling_hashes(arr, block_size):
+    """Hash of the block starting at every offset of `arr` (same hash as block_hashes)."""
+    n = len(arr) - block_size + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.uint64)
+    prefix = np.zeros(len(arr) + 1, dtype=np.uint64)
+    np.cumsum(arr.astype(np.uint64) * _powers(_P, len(arr)), dtype=np.uint64, out=prefix[1:])
+    return (prefix[block_size:] - prefix[:n]) * _powers(_P_INV, n)
+
+
+def _forward_match(a, ao, b, bo, limit):
+    """Length of the common run of a[ao:] and b[bo:], at most `limit` bytes."""
+    limit = min(limit, len(a) - ao, len(b) - bo)
+    length = 0
+    step = _EXTEND_STEP
+    while length < limit:
+        n = min(step, limit - length)
+        diff = np.flatnonzero(a[ao + length:ao + length + n] != b[bo + length:bo + length + n])
+        if len(diff):
+            return length + int(diff[0])
+        length += n
+        step *= 2
+    return length
+
+
+def _backward_match(a, ao, b, bo, limit):
+    """Length of the common run ending just before a[ao] and b[bo], at most `limit` bytes."""
+    limit = min(limit, ao, bo)
+    length = 0
+    step = _EXTEND_STEP
+    while length < limit:
+        n = min(step, limit - length)
+        diff = np.flatnonzero(a[ao - length - n:ao - length][::-1] != b[bo - length - n:bo - length][::-1])
+        if len(diff):
+            return length + int(diff[0])
+        length += n
+        step *= 2
+    return length
+
+
+def aligned_matches(a, b, min_length=DEFAULT_BLOCK_SIZE):
+    """Runs where both files hold the same bytes at the same offset, as (old, new, length)."""
+    n = min(len(a), len(b))
+    equal = np.concatenate([[False], a[:n] == b[:n], [False]])
+    edges = np.flatnonzero(equal[1:] != equal[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    keep = ends - starts >= min_length
+    return [(s, s, e - s) for s, e in zip(starts[keep].tolist(), ends[keep].tolist())]
+
+
+def find_matches(a, b, block_size=DEFAULT_BLOCK_SIZE):
+    """Matching regions between old `a` and new `b` (uint8 arrays), sorted by new offset.
+
+    Aligned runs are found first with a plain array comparison. The rest of the new
+    file is searched for blocks of the old file at any offset with a rolling hash,
+    and every hit is verified and extended byte-wise in both directions.
+    Returns non-overlapping (old_offset, new_offset, length) tuples.
+    """
+    anchored = aligned_matches(a, b, block_size)
+    covered = np.zeros(len(b) + 1, dtype=bool)
+    for _, new, length in anchored:
+        covered[new:new + length] = True
+
+    matches = list(anchored)
+    old_hashes = block_hashes(a, block_size)
+    if len(old_hashes) and len(b) >= block_size:
+        order = np.argsort(old_hashes, kind='stable')
+        sorted_hashes = old_hashes[order]
+
+        # Top hash bits of the old blocks, to skip most misses before the binary search
+        present = np.zeros(1 << FILTER_BITS, dtype=bool)
+        present[old_hashes >> np.uint64(64 - FILTER_BITS)] = True
+
+        anchor_starts = np.array([new for _, new, _ in anchored] + [len(b)], dtype=np.int64)
+        anchor_ends = np.array([0] + [new + length for _, new, length in anchored], dtype=np.int64)
+        found = []
+        prev_new_end, prev_old_end = 0, 0
+        start = 0
+        while start <= len(b) - block_size:
+            # Candidate (new offset, old block) pairs of this chunk outside the aligned runs
+            stop = min(len(b), start + HASH_CHUNK + block_size - 1)
+            hashes = rolling_hashes(b[start:stop], block_size)
+            positions = np.flatnonzero(~covered[start:start + len(hashes)])
+            positions = positions[present[hashes[positions] >> np.uint64(64 - FILTER_BITS)]]
+            idx = np.minimum(np.searchsorted(sorted_hashes, hashes[positions]), len(sorted_hashes) - 1)
+            hit = sorted_hashes[idx] == hashes[positions]
+            cand_new = start + positions[hit]
+            cand_old = order[idx[hit]] * block_size
+
+            k = 0
+            while k < len(cand_new):
+                new = int(cand_new[k])
+                # Matches may not run into the next aligned run, or back past the previous match
+                anchor = int(np.searchsorted(anchor_starts, new, side='right'))
+                next_anchor = int(anchor_starts[anchor])
+                prev_end = max(prev_new_end, int(anchor_ends[anchor])) # End of the aligned run before `new`
+                # Prefer continuing the previous match's old position (e.g. repeated blocks)
+                old = prev_old_end + (new - prev_new_end)
+                if not (0 <= old <= len(a) - block_size and _forward_match(a, old, b, new, block_size) == block_size):
+                    old = int(cand_old[k])
+                forward = _forward_match(a, old, b, new, next_anchor - new)
+                if forward < block_size:
+                    k += 1 # Hash collision
+                    continue
+                back = _backward_match(a, old, b, new, new - prev_end)
+                found.append((old - back, new - back, back + forward))
+                prev_new_end, prev_old_end = new + forward, old + forward
+                k = int(np.searchsorted(cand_new, prev_new_end))
+            # A match running past this chunk lets the next one start after it
+            start = max(start + len(hashes), prev_new_end)
+        matches.extend(found)
+
+    matches.sort(key=lambda m: m[1])
+    # Merge regions that continue each other in both files
+    merged = []
+    for old, new, length in matches:
+        if merged and merged[-1][1] + merged[-1][2] == new and merged[-1][0] + merged[-1][2] == old:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + length)
+        else:
+            merged.append((old, new, length))
+    return merged
+
+
+def edit_script(old_size, new_size, matches):
+    """Turn matches into insert/delete/replace/move operations ordered by new offset.
+
+    Each op is a dict with op, old_offset, old_length, new_offset, new_length. A
+    'move' is a matching region found before the current old position (data that
+    moved back); 'equal' regions are left out.
+    """
+    ops = []
+    old_pos, new_pos = 0, 0
+
+    def gap(old_end, new_end):
+        old_len, new_len = old_end - old_pos, new_end - new_pos
+        if old_len > 0 and new_len > 0:
+            ops.append({'op': 'replace', 'old_offset': old_pos, 'old_length': old_len, 'new_offset': new_pos, 'new_length': new_len})
+        elif old_len > 0:
+            ops.append({'op': 'delete', 'old_offset': old_pos, 'old_length': old_len, 'new_offset': new_pos, 'new_length': 0})
+        elif new_len > 0:
+            ops.append({'op': 'insert', 'old_offset': old_pos, 'old_length': 0, 'new_offset': new_pos, 'new_length': new_len})
+
+    for old, new, length in matches:
+        if old >= old_pos:
+            gap(old, new)
+            old_pos = old + length
+        else:
+            gap(old_pos, new) # New bytes before the moved region are an insert
+            ops.append({'op': 'move', 'old_offset': old, 'old_length': length, 'new_offset': new, 'new_length': length})
+        new_pos = new + length
+    gap(old_size, new_size)
+    return ops
+
+
+def diff_bytes(old_data, new_data, block_size=DEFAULT_BLOCK_SIZE):
+    """Diff two buffers. Returns (matches, ops)."""
+    a = np.frombuffer(old_data, dtype=np.uint8)
+    b = np.frombuffer(new_data, dtype=np.uint8)
+    matches = find_matches(a, b, block_size)
+    return matches, edit_script(len(a), len(b), matches)
+
+
+def format_ops(ops, limit=50):
+    lines = []
+    for op in ops[:limit]:
+        lines.append(f"  {op['op']:<7} old 0x{op['old_offset']:08x}+{op['old_length']:<6} "
+                     f"new 0x{op['new_offset']:08x}+{op['new_length']}")
+    if len(ops) > limit:
+        lines.append(f"  ... and {len(ops) - limit} more operations")
+    return "\n".join(lines)
+
+
+def diff_files(old_path, new_path, block_size=DEFAULT_BLOCK_SIZE):
+    """Diff two files over mmap. Returns (old_size, new_size, matches, ops)."""
+    with open(old_path, 'rb') as f1, open(new_path, 'rb') as f2:
+        sizes = [os.fstat(f.fileno()).st_size for f in (f1, f2)]
+        maps = [mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b'' for f, size in zip((f1, f2), sizes)]
+        try:
+            matches, ops = diff_bytes(maps[0], maps[1], block_size)
+        finally:
+            for m in maps:
+                if isinstance(m, mmap.mmap):
+                    m.close()
+    return sizes[0], sizes[1], matches, ops
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Block-hash diff of two binary files (aligned and shifted matches).')
+    parser.add_argument('old_file', help='Original file.')
+    parser.add_argument('new_file', help='Changed file.')
+    parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE,
+                        help=f'Minimum matching region in bytes (default: {DEFAULT_BLOCK_SIZE}).')
+    parser.add_argument('--json', action='store_true', help='Print the edit script as JSON.')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        old_size, new_size, matches, ops = diff_files(args.old_file, args.new_file, args.block_size)
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(ops, indent=2))
+    else:
+        matched = sum(length for _, _, length in matches)
+        print(f"Old: {old_size} bytes, new: {new_size} bytes, {matched} bytes matched in {len(matches)} regions")
+        print(f"{len(ops)} operations ({elapsed * 1000:.1f} ms):")
+        print(format_ops(ops))
@@ -1,11 +1,18 @@
 import os
+import io
+import bisect
+import sys
 import json
 import re
 import struct
 import binascii
-import shutil
 from datetime import datetime
 
+workspace_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+sys.path.insert(0, os.path.join(workspace_root, 'seeder', 'python_scripts'))
+import nrbf
+import decode_markers
+
 # Your player ID
 YOUR_PLAYER_ID = "5242d45d-ef6d-49fd-a266-d1ec50fa5151"
 
@@ -14,139 +21,189 @@ def load_json_data(json_file):
     with open(json_file, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+def id_pattern(player_id):
+    """Case-insensitive bytes pattern for an ID, with its hyphens optional."""
+    parts = [re.escape(part.encode('latin-1')) for part in player_id.split('-')]
+    return re.compile(b'-?'.join(parts), re.IGNORECASE)
+
+def find_id_patches(data, old_id, new_id):
+    """Collect (start, end, replacement) for every occurrence of old_id in one regex pass.
+
+    Hyphen-less matches are replaced by the hyphen-less new ID, so the ID keeps
+    the form it had in the file.
+    """
+    new_plain = new_id.replace('-', '').encode('latin-1')
+    new_full = new_id.encode('latin-1')
+    patches = []
+    for match in id_pattern(old_id).finditer(data):
+        replacement = new_plain if b'-' not in match.group() else new_full
+        patches.append((match.start(), match.end(), replacement))
+    return patches
+
+def fix_length_prefixes(data, patches):
+    """Add patches rewriting the NRBF length prefix of every string whose size changes.
+
+    Patches that change length outside a LengthPrefixedString would shift the
+    stream, so they are dropped (with a warning). Returns the new patch list,
+    or None if `data` is not a parseable NRBF stream.
+    """
+    try:
+        spans = nrbf.string_spans(data)
+    except (nrbf.NrbfError, UnicodeDecodeError):
+        return None
+
+    payload_starts = [payload for _, payload, _ in spans]
+    growth = {} # span index -> total size change
+    kept = []
+    dropped = 0
+    for start, end, replacement in patches:
+        delta = len(replacement) - (end - start)
+        if delta == 0:
+            kept.append((start, end, replacement))
+            continue
+        i = bisect.bisect_right(payload_starts, start) - 1
+        if i < 0 or end > spans[i][1] + spans[i][2]:
+            dropped += 1
+            continue
+        growth[i] = growth.get(i, 0) + delta
+        kept.append((start, end, replacement))
+    if dropped:
+        print(f"Warning: Skipped {dropped} length-changing replacements outside NRBF strings")
+
+    for i, delta in growth.items():
+        prefix_offset, payload_offset, length = spans[i]
+        kept.append((prefix_offset, payload_offset, nrbf.encode_string_length(length + delta)))
+    kept.sort(key=lambda patch: patch[0])
+    return kept
+
+def apply_patches(data, patches):
+    """Apply sorted, non-overlapping (start, end, replacement) patches in one linear rebuild."""
+    result = bytearray()
+    position = 0
+    for start, end, replacement in patches:
+        result += data[position:start]
+        result += replacement
+        position = end
+    result += data[position:]
+    return bytes(result)
+
 def replace_player_id(data, old_id, new_id):
-    """Replace player ID in binary data"""
+    """Replace player ID in binary data
+
+    All matches (any case, with or without hyphens) are patched in one pass. If the
+    IDs differ in length, the NRBF string length prefixes are rewritten to match and
+    the result is re-parsed to make sure the file is still valid.
+    """
     if old_id is None or new_id is None:
         print("Warning: Missing player ID, replacement might not work")
         return data
-    
-    # Replace standard UUID format (with hyphens)
-    old_id_bytes = old_id.encode('latin-1')
-    new_id_bytes = new_id.encode('latin-1')
-    
-    # Only proceed if the IDs are the same length
-    if len(old_id_bytes) != len(new_id_bytes):
-        print(f"Warning: ID length mismatch: {len(old_id_bytes)} vs {len(new_id_bytes)}")
-    
-    # Replace all occurrences
-    modified_data = data.replace(old_id_bytes, new_id_bytes)
-    
-    # Also try replacing without hyphens
-    old_id_no_hyphens = old_id.replace('-', '').encode('latin-1')
-    new_id_no_hyphens = new_id.replace('-', '').encode('latin-1')
-    
-    if len(old_id_no_hyphens) == len(new_id_no_hyphens):
-        modified_data = modified_data.replace(old_id_no_hyphens, new_id_no_hyphens)
-    
-    # Check if any replacements were made
-    if modified_data == data:
-        print("Warning: No player ID replacements were made. Trying alternative approaches...")
-        
-        # Try with varying case since UUIDs might be case-insensitive
-        data_str = data.decode('latin-1', errors='ignore')
-        old_id_pattern = re.escape(old_id).replace('\\-', '[-]?')  # Make hyphens optional
-        
-        # Create a case-insensitive pattern
-        pattern = re.compile(old_id_pattern, re.IGNORECASE)
-        
-        # Find all matches
-        matches = list(pattern.finditer(data_str))
-        if matches:
-            print(f"Found {len(matches)} potential ID matches with case-insensitive search")
-            
-            # Replace matches
-            result_str = data_str
-            offset = 0
-            for match in matches:
-                start = match.start() + offset
-                end = match.end() + offset
-                result_str = result_str[:start] + new_id + result_str[end:]
-                offset += len(new_id) - (end - start)
-            
-            # Convert back to bytes
-            modified_data = result_str.encode('latin-1', errors='ignore')
-    
+
+    patches = find_id_patches(data, old_id, new_id)
+    if not patches:
+        print("Warning: No player ID replacements were made")
+        return data
+    print(f"Found {len(patches)} player ID occurrences")
+
+    resized = any(len(replacement) != end - start for start, end, replacement in patches)
+    if resized:
+        print(f"ID length mismatch: {len(old_id)} vs {len(new_id)}, fixing NRBF length prefixes")
+        fixed = fix_length_prefixes(data, patches)
+        if fixed is None:
+            print("Warning: Data is not a valid NRBF stream, only same-length replacements are applied")
+            fixed = [patch for patch in patches if len(patch[2]) == patch[1] - patch[0]]
+        patches = fixed
+
+    modified_data = apply_patches(data, patches)
+
+    # Verify the patched stream still parses (skipped if the input did not parse either)
+    try:
+        nrbf.load(io.BytesIO(modified_data))
+    except (nrbf.NrbfError, UnicodeDecodeError) as e:
+        try:
+            nrbf.load(io.BytesIO(data))
+        except (nrbf.NrbfError, UnicodeDecodeError):
+            return modified_data
+        print(f"Warning: Patched data no longer parses ({e}), keeping the original")
+        return data
+
     return modified_data
 
-def replace_file_header(source_file, target_file, friend_data, output_file):
-    """Replace the file header from source_file with the one from target_file"""
-    print(f"Creating hybrid file from {os.path.basename(source_file)} and {os.path.basename(target_file)}")
-    
-    with open(source_file, 'rb') as f:
-        friend_file_data = f.read()
-    
-    with open(target_file, 'rb') as f:
-        your_file_data = f.read()
-    
-    # Determine how much of the header to keep
-    # This is a bit tricky - we'll assume the MinimapMarkerInfo position is a good dividing point
-    marker_info_pos_friend = friend_file_data.find(b'MinimapMarkerInfo')
-    marker_info_pos_your = your_file_data.find(b'MinimapMarkerInfo')
-    
-    if marker_info_pos_friend == -1 or marker_info_pos_your == -1:
-        print("Warning: Could not find MinimapMarkerInfo in one or both files")
-        header_length = min(100, len(your_file_data))  # Fallback to first 100 bytes
-    else:
-        # Take your header up to MinimapMarkerInfo + a few bytes before it
-        # This should preserve your player ID in the header
-        header_length = marker_info_pos_your
-    
-    # Create hybrid file:
-    # Your header + Friend's data after the marker info position
-    if marker_info_pos_friend != -1 and header_length < len(your_file_data):
-        hybrid_data = your_file_data[:header_length] + friend_file_data[marker_info_pos_friend:]
-    else:
-        # Fallback: use a simple header replacement
-        # Take your header (first X bytes) and the friend's file content after those bytes
-        header_length = min(100, len(your_file_data))
-        hybrid_data = your_file_data[:header_length] + friend_file_data[header_length:]
-    
-    # Write the hybrid file
-    with open(output_file, 'wb') as f:
-        f.write(hybrid_data)
-    
-    print(f"Created hybrid file: {os.path.basename(output_file)}")
-    print(f"  - Header from: {os.path.basename(target_file)} ({header_length} bytes)")
-    print(f"  - Content from: {os.path.basename(source_file)}")
-    
-    return hybrid_data
+def marker_items(root):
+    """Return (backing array, list object or None) of a deserialized marker collection."""
+    if isinstance(root, nrbf.NrbfArray):
+        return root, None
+    if isinstance(root, nrbf.NrbfObject) and isinstance(root.get('_items'), nrbf.NrbfArray):
+        return root.get('_items'), root
+    raise nrbf.NrbfError(f"Root object is not a marker collection: {root!r}")
+
+def marker_guid(marker):
+    guid = marker.get('guid')
+    return guid.replace('-', '').lower() if isinstance(guid, str) else None
+
+def replace_id_members(marker, old_id, new_id):
+    """Replace old_id inside the string members of a decoded marker."""
+    pattern = id_pattern(old_id)
+    for name, value in marker.members.items():
+        if isinstance(value, str):
+            replaced = pattern.sub(new_id.encode('latin-1'), value.encode('utf-8'))
+            marker.members[name] = replaced.decode('utf-8')
+
+def merge_markers(target_root, source_root, old_id=None, new_id=None):
+    """Append the source markers whose GUID is not in the target collection.
+
+    Markers present in both keep the target's version. Returns (added, skipped).
+    """
+    array, owner = marker_items(target_root)
+    items = list(decode_markers.iter_marker_objects(target_root))
+    known = {marker_guid(marker) for marker in items}
+
+    added = skipped = 0
+    for marker in decode_markers.iter_marker_objects(source_root):
+        guid = marker_guid(marker)
+        if guid in known:
+            skipped += 1
+            continue
+        if old_id and new_id:
+            replace_id_members(marker, old_id, new_id)
+        known.add(guid)
+        items.append(marker)
+        added += 1
+
+    array.items = items
+    if owner is not None:
+        size_key = next(key for key in owner.members if key == '_size' or key.endswith('+_size'))
+        owner.members[size_key] = len(items)
+    return added, skipped
+
+def merge_marker_files(source_file, target_file, output_file, old_id=None, new_id=None):
+    """Merge the markers of source_file into target_file's object graph and write output_file.
+
+    Both files are parsed as NRBF; the merged graph is serialized in a single
+    write, so the output keeps the target's header and records.
+    """
+    target_root = nrbf.load_file(target_file)
+    source_root = nrbf.load_file(source_file)
+    added, skipped = merge_markers(target_root, source_root, old_id, new_id)
+    nrbf.dump_file(target_root, output_file)
+    return added, skipped
 
 def fix_marker_file(friend_file, your_file, json_data, output_file):
-    """Create a fixed marker file by combining methods"""
-    # Read the files
-    with open(friend_file, 'rb') as f:
-        friend_data = f.read()
-    
-    with open(your_file, 'rb') as f:
-        your_data = f.read()
-    
-    # Step 1: Extract Player IDs
+    """Create a fixed marker file: your file with the friend's markers merged in by GUID"""
     friend_id = json_data.get('file_info', {}).get('player_id')
-    
-    # Step 2: Try direct player ID replacement if friend ID was found
     if friend_id:
-        print(f"Attempting to replace player ID: {friend_id} with {YOUR_PLAYER_ID}")
-        modified_data = replace_player_id(friend_data, friend_id, YOUR_PLAYER_ID)
-        
-        # Write the ID-replaced file
-        id_replaced_file = f"{os.path.splitext(output_file)[0]}_id_replaced.minimapdata"
-        with open(id_replaced_file, 'wb') as f:
-            f.write(modified_data)
-        print(f"Created ID-replaced file: {os.path.basename(id_replaced_file)}")
+        print(f"Replacing player ID {friend_id} with {YOUR_PLAYER_ID} in merged markers")
     else:
         print("Warning: Could not find friend's player ID in the data")
-        modified_data = friend_data  # Just use the original data
-    
-    # Step 3: Create a hybrid file with your header and friend's content
-    hybrid_data = replace_file_header(friend_file, your_file, json_data, 
-                                     f"{os.path.splitext(output_file)[0]}_hybrid.minimapdata")
-    
-    # Step 4: Create a final "best effort" file
-    # This is either the ID-replaced file or the hybrid file, depending on which seems more promising
-    # For simplicity, we'll use the hybrid approach as it's often more reliable
-    shutil.copy(f"{os.path.splitext(output_file)[0]}_hybrid.minimapdata", output_file)
-    print(f"Created final fixed file: {os.path.basename(output_file)}")
-    
+
+    try:
+        added, skipped = merge_marker_files(friend_file, your_file, output_file, friend_id, YOUR_PLAYER_ID)
+    except (OSError, nrbf.NrbfError, UnicodeDecodeError) as e:
+        print(f"Error: Could not merge {os.path.basename(friend_file)} into {os.path.basename(your_file)}: {e}")
+        return None
+
+    print(f"Created fixed file: {os.path.basename(output_file)}")
+    print(f"  - Base: {os.path.basename(your_file)}")
+    print(f"  - Added {added} markers from {os.path.basename(friend_file)} ({skipped} already present)")
     return output_file
 
 def create_export_file(friend_file, your_file, markers_data, output_dir):
@@ -212,15 +269,9 @@ if __name__ == "__main__":
     create_export_file(friend_markers_file, your_markers_file, friend_markers_data, output_dir)
     create_export_file(friend_entities_file, your_entities_file, friend_entities_data, output_dir)
     
-    print("\nFile fixing complete! You now have several options:")
-    print("1. Try the 'fixed_markers.minimapdata' and 'fixed_entities.minimapdata' files")
-    print("   These should be the most likely to work in-game.")
-    print()
-    print("2. If those don't work, try the '_id_replaced' versions")
-    print("   These focus on replacing just the player ID.")
-    print()
-    print("3. If those don't work, try the '_hybrid' versions")
-    print("   These replace the file header with your own header.")
+    print("\nFile fixing complete!")
+    print("The 'fixed_markers.minimapdata' and 'fixed_entities.minimapdata' files contain")
+    print("your own markers plus every marker of your friend's files you did not have yet.")
     print()
     print("Installation:")
     print("1. Make a backup of your original files!")
@@ -228,5 +279,5 @@ if __name__ == "__main__":
     print("3. Place them in your game directory, replacing your current files")
     print("4. Start the game and check if the markers appear")
     print()
-    print("If none of these methods work, you can use the exported markers text file")
+    print("If the fixed files do not work, you can use the exported markers text file")
     print("as a reference to manually place markers in-game.") 
\ No newline at end of file
@@ -1,39 +1,72 @@
 import os
-import re
-from PIL import Image
 import sys
 import math
 import argparse # Import argparse
+import numpy as np
+from terrain_cache import load_terrain, composite_origin, tile_image, write_tile_manifest
+from tile_catalog import load_catalog
 
-# Function to parse coordinates from filenames (similar to stitch_minimap.py)
-def parse_coordinates(filename):
-    """Parses coordinates from X-Y-Z.png or X-Y-terrain.png filenames."""
-    name = os.path.splitext(filename)[0]
-    # Match X-Y-Z format (handles negatives)
-    match = re.match(r'(-?\d+)-(-?\d+)-(-?\d+)', name)
-    if match:
-        x = int(match.group(1))
-        y = int(match.group(2))
-        z = int(match.group(3))
-        return x, y, z
-    else:
-        # Try parsing terrain tile format X-Y-terrain
-        match_terrain = re.match(r'(-?\d+)-(-?\d+)-terrain', name)
-        if match_terrain:
-            x = int(match_terrain.group(1))
-            y = int(match_terrain.group(2))
-            # Assign a special Z level or handle differently if needed, here using None
-            return x, y, None 
-        else:
-            # Raise error only if it doesn't match either known format
-            raise ValueError(f"Invalid filename format: {filename}")
+MAPPING_FILENAME = 'tile_mapping.npy'
+
+# Status of a mapping row
+TILE_WRITTEN = 0 # X-Y-terrain.png was written
+TILE_EMPTY = 1 # The tile box does not overlap the terrain; no file
+TILE_ERROR = 2 # Cutting or saving the tile failed
+
+# Tile-to-terrain mapping, one row per (X, Y) sorted by (x, y). composite_* is the
+# top-left corner of the tile in the stitched composite, terrain_* the same corner
+# on the terrain and crop_* the part of the tile box on the terrain (empty when
+# status is TILE_EMPTY).
+MAPPING_DTYPE = np.dtype([
+    ('x', '<i4'), ('y', '<i4'),
+    ('composite_x', '<i4'), ('composite_y', '<i4'),
+    ('terrain_x', '<i4'), ('terrain_y', '<i4'),
+    ('crop_left', '<i4'), ('crop_top', '<i4'), ('crop_right', '<i4'), ('crop_bottom', '<i4'),
+    ('status', 'u1'),
+])
+
+
+def save_tile_mapping(output_dir, mapping):
+    """Write the mapping table as tile_mapping.npy in `output_dir` (atomically). Returns its path."""
+    path = os.path.join(output_dir, MAPPING_FILENAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp_path, mapping)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_tile_mapping(path):
+    """Memory-map a tile_mapping.npy (or the one in a tile directory) as a MAPPING_DTYPE array."""
+    if os.path.isdir(path):
+        path = os.path.join(path, MAPPING_FILENAME)
+    return np.load(path, mmap_mode='r')
+
+
+def _tile_keys(xs, ys):
+    """int64 keys that sort like (x, y) tuples."""
+    return np.asarray(xs, dtype=np.int64) * 2**32 + (np.asarray(ys, dtype=np.int64) + 2**31)
 
-def generate_terrain_tiles(input_dir, terrain_path, offset_tx, offset_ty):
-    """Generates background terrain tiles corresponding to existing minimap tiles."""
+
+def find_tiles(mapping, xs, ys):
+    """Row indices of the (xs, ys) tiles in the mapping (vectorized), -1 where a tile is not mapped."""
+    wanted = _tile_keys(xs, ys)
+    if len(mapping) == 0:
+        return np.full(wanted.shape, -1, dtype=np.intp)
+    keys = _tile_keys(mapping['x'], mapping['y'])
+    rows = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+    return np.where(keys[rows] == wanted, rows, -1)
+
+
+def generate_terrain_tiles(input_dir, terrain_path, offset_tx, offset_ty, cache_dir=None):
+    """Generates background terrain tiles corresponding to existing minimap tiles.
+    The terrain is read from the memory-mapped raster cache (see terrain_cache.py).
+    Tiles whose crop box has no terrain are not written; the tiles that are present
+    are listed in terrain_manifest.json and the position of every tile on the
+    composite and the terrain is stored in tile_mapping.npy (see load_tile_mapping)."""
     print(f"Scanning directory: {input_dir} for minimap tiles...")
     
     try:
-        all_files = [f for f in os.listdir(input_dir) if f.endswith('.png')]
+        catalog = load_catalog(input_dir)
     except FileNotFoundError:
         print(f"Error: Input directory not found: {input_dir}")
         return
@@ -41,51 +74,26 @@ def generate_terrain_tiles(input_dir, terrain_path, offset_tx, offset_ty):
         print(f"Error listing files in directory {input_dir}: {e}")
         return
 
-    # Filter out already existing terrain tiles to avoid using them as coordinate sources
-    map_files = [f for f in all_files if not f.endswith('-terrain.png')]
+    # Map tiles only; existing X-Y-terrain.png tiles are not coordinate sources
+    map_rows = catalog.select('.png')
     
-    if not map_files:
+    if len(map_rows) == 0:
         print(f"Error: No standard minimap tile files (e.g., X-Y-Z.png) found in '{input_dir}'. Cannot determine bounds.")
         return
 
-    coords = []
-    tile_width, tile_height = -1, -1
-    unique_xy_coords = set()
-
     # --- Discover Tile Coordinates and Dimensions --- 
+    # Both come from the catalog index; dimensions are read from the PNG headers
     print("Discovering tile coordinates and dimensions...")
-    for i, f in enumerate(map_files):
-        try:
-            x, y, z = parse_coordinates(f)
-            # Ensure we parsed a standard tile with a Z level
-            if z is not None: 
-                coords.append((x, y, z))
-                unique_xy_coords.add((x, y))
-                # Get tile dimensions from the first valid file found
-                if tile_width == -1:
-                    try:
-                        img_path = os.path.join(input_dir, f)
-                        with Image.open(img_path) as img:
-                            tile_width, tile_height = img.size
-                        if tile_width <= 0 or tile_height <= 0:
-                             raise ValueError("Invalid tile dimensions detected.")
-                        print(f"Detected tile size: {tile_width}x{tile_height} from {f}")
-                    except Exception as e:
-                        print(f"Error reading tile '{f}' to get dimensions: {e}")
-                        return # Cannot proceed without tile dimensions
-        except ValueError as e:
-            # This catches filenames that don't match expected patterns
-            print(f"Warning: Skipping file with potentially invalid name '{f}' - {e}")
-            continue
-        except Exception as e:
-             print(f"Warning: Unexpected error processing file '{f}': {e}")
-             continue
-
-
-    if tile_width == -1:
+    tile_size = catalog.tile_size(map_rows)
+    if tile_size is None:
         print("Error: Could not determine tile dimensions from any valid minimap file.")
         return
-        
+    tile_width, tile_height = tile_size
+    print(f"Detected tile size: {tile_width}x{tile_height} from {len(map_rows)} tile headers")
+
+    entries = catalog.entries[map_rows]
+    unique_xy_coords = set(zip(entries['x'].tolist(), entries['y'].tolist()))
+
     if not unique_xy_coords:
          print("Error: No valid (X, Y) coordinates found from standard minimap tiles.")
          return
@@ -100,8 +108,8 @@ def generate_terrain_tiles(input_dir, terrain_path, offset_tx, offset_ty):
     # --- Load Terrain Image --- 
     try:
         print(f"Loading terrain background: {terrain_path}")
-        terrain_img = Image.open(terrain_path).convert('RGBA')
-        terrain_w, terrain_h = terrain_img.size
+        terrain = load_terrain(terrain_path, cache_dir)
+        terrain_h, terrain_w = terrain.shape[:2]
         print(f"Terrain dimensions: {terrain_w}x{terrain_h}")
     except FileNotFoundError:
         print(f"Error: Terrain image not found at {terrain_path}")
@@ -110,95 +118,61 @@ def generate_terrain_tiles(input_dir, terrain_path, offset_tx, offset_ty):
         print(f"Error loading terrain image: {e}")
         return
 
-    # --- Generate Tiles --- 
-    print(f"Generating terrain tiles for {len(unique_xy_coords)} unique (X,Y) locations...")
+    # --- Build Mapping Table --- 
+    # One row per (X, Y), computed for all tiles at once: composite position, terrain
+    # position and the part of the tile box that lies on the terrain
     output_dir = input_dir # Save tiles in the same directory
-    debug_log_path = os.path.join(output_dir, "tile_mapping_debug.txt") # Debug log file path
+    sorted_unique_xy = sorted(unique_xy_coords)
+    mapping = np.zeros(len(sorted_unique_xy), dtype=MAPPING_DTYPE)
+    mapping['x'], mapping['y'] = np.array(sorted_unique_xy, dtype=np.int32).T
+    mapping['composite_x'], mapping['composite_y'] = composite_origin(
+        mapping['x'], mapping['y'], min_x, max_y, tile_width, tile_height)
+    mapping['terrain_x'] = mapping['composite_x'] + offset_tx
+    mapping['terrain_y'] = mapping['composite_y'] + offset_ty
+    mapping['crop_left'] = np.clip(mapping['terrain_x'], 0, terrain_w)
+    mapping['crop_top'] = np.clip(mapping['terrain_y'], 0, terrain_h)
+    mapping['crop_right'] = np.clip(mapping['terrain_x'] + tile_width, 0, terrain_w)
+    mapping['crop_bottom'] = np.clip(mapping['terrain_y'] + tile_height, 0, terrain_h)
+    has_terrain = (mapping['crop_right'] > mapping['crop_left']) & (mapping['crop_bottom'] > mapping['crop_top'])
+    mapping['status'] = np.where(has_terrain, TILE_WRITTEN, TILE_EMPTY)
+
+    # --- Generate Tiles --- 
+    print(f"Generating terrain tiles for {len(sorted_unique_xy)} unique (X,Y) locations...")
     generated_count = 0
     skipped_count = 0
+    empty_count = int((~has_terrain).sum())
+    present_tiles = []
 
-    # Use sorted list for deterministic output order (optional)
-    sorted_unique_xy = sorted(list(unique_xy_coords))
-    
-    # Open debug log file
-    try:
-        with open(debug_log_path, 'w') as debug_f:
-            debug_f.write(f"Tile Generation Debug Log\n")
-            debug_f.write(f"Input Dir: {input_dir}\n")
-            debug_f.write(f"Terrain Path: {terrain_path}\n")
-            debug_f.write(f"Offset (tx, ty): ({offset_tx}, {offset_ty})\n")
-            debug_f.write(f"Tile Bounds: X=[{min_x}, {max_x}], Y=[{min_y}, {max_y}]\n")
-            debug_f.write(f"Tile Size: {tile_width}x{tile_height}\n")
-            debug_f.write("-"*20 + "\n")
-            debug_f.write("Tile (X, Y) | Composite Pos (px, py) | Terrain Crop Box (L, T, R, B)\n")
-            debug_f.write("-"*20 + "\n")
+    for row in mapping:
+        x, y = int(row['x']), int(row['y'])
+        output_path = os.path.join(output_dir, f"{x}-{y}-terrain.png")
+        if row['status'] == TILE_EMPTY:
+            # No terrain under this tile: nothing to write, and a tile left by an earlier run is stale
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            continue
 
-            for x, y in sorted_unique_xy:
-                # Calculate composite position
-                pos_x_in_composite = (x - min_x) * tile_width
-                pos_y_in_composite = (max_y - y) * tile_height 
-                
-                # Calculate terrain position
-                pos_x_on_terrain = pos_x_in_composite + offset_tx
-                pos_y_on_terrain = pos_y_in_composite + offset_ty
-                
-                # Desired crop box
-                desired_crop_box_on_terrain = (
-                    pos_x_on_terrain, pos_y_on_terrain, 
-                    pos_x_on_terrain + tile_width, pos_y_on_terrain + tile_height
-                )
-                
-                # Create new tile
-                new_tile = Image.new('RGBA', (tile_width, tile_height), (0, 0, 0, 0))
-                
-                # Calculate intersection
-                crop_left = max(0, desired_crop_box_on_terrain[0])
-                crop_top = max(0, desired_crop_box_on_terrain[1])
-                crop_right = min(terrain_w, desired_crop_box_on_terrain[2])
-                crop_bottom = min(terrain_h, desired_crop_box_on_terrain[3])
-                
-                actual_crop_box_on_terrain_str = "None (No Overlap)"
-                if crop_right > crop_left and crop_bottom > crop_top:
-                    actual_crop_box_on_terrain = (int(crop_left), int(crop_top), int(crop_right), int(crop_bottom))
-                    actual_crop_box_on_terrain_str = f"({actual_crop_box_on_terrain[0]}, {actual_crop_box_on_terrain[1]}, {actual_crop_box_on_terrain[2]}, {actual_crop_box_on_terrain[3]})"
-                    try:
-                        terrain_part = terrain_img.crop(actual_crop_box_on_terrain)
-                        paste_x = int(max(0, 0 - (desired_crop_box_on_terrain[0]))) 
-                        paste_y = int(max(0, 0 - (desired_crop_box_on_terrain[1])))
-                        new_tile.paste(terrain_part, (paste_x, paste_y))
-                    except Exception as e:
-                        print(f"\nError cropping/pasting terrain for tile ({x},{y}): {e}")
-                        skipped_count += 1
-                        # Write error to log too
-                        debug_f.write(f"({x:>4}, {y:>4}) | ({pos_x_in_composite:>5}, {pos_y_in_composite:>5}) | ERROR Cropping/Pasting: {e}\n")
-                        continue 
-                
-                # Write info to debug log
-                debug_f.write(f"({x:>4}, {y:>4}) | ({pos_x_in_composite:>5}, {pos_y_in_composite:>5}) | {actual_crop_box_on_terrain_str}\n")
+        # Create new tile: a view of the terrain when it lies inside it, padded only at the edges
+        try:
+            new_tile = tile_image(terrain, int(row['terrain_x']), int(row['terrain_y']), tile_width, tile_height)
+            new_tile.save(output_path)
+        except Exception as e:
+            print(f"\nError generating tile {output_path}: {e}")
+            row['status'] = TILE_ERROR
+            skipped_count += 1
+            continue
+        generated_count += 1
+        present_tiles.append((x, y))
+        if generated_count % 100 == 0:
+            print(f"  Generated {generated_count}/{len(sorted_unique_xy)} terrain tiles...", end='\r')
 
-                # Save the tile
-                output_filename = f"{x}-{y}-terrain.png"
-                output_path = os.path.join(output_dir, output_filename)
-                try:
-                    new_tile.save(output_path)
-                    generated_count += 1
-                    if generated_count % 100 == 0 or generated_count == len(unique_xy_coords):
-                        print(f"  Generated {generated_count}/{len(unique_xy_coords)} terrain tiles...", end='\r')
-                except Exception as e:
-                    print(f"\nError saving tile {output_path}: {e}")
-                    skipped_count += 1
-            
-    except IOError as e:
-        print(f"\nError opening debug log file '{debug_log_path}': {e}")
-        # Optionally, continue without logging?
-        # For now, let's stop if we can't log
-        return 
-    except Exception as e:
-        print(f"\nAn unexpected error occurred during tile generation: {e}")
-        return
-            
-    print(f"\nFinished. Generated {generated_count} terrain tiles, skipped {skipped_count} due to errors, in '{output_dir}'.")
-    print(f"Debug log written to: {debug_log_path}")
+    mapping_path = save_tile_mapping(output_dir, mapping)
+    manifest_path = write_tile_manifest(output_dir, present_tiles, tile_width, tile_height,
+                                        offset=[offset_tx, offset_ty], bounds=[min_x, max_x, min_y, max_y])
+    print(f"\nFinished. Generated {generated_count} terrain tiles, skipped {skipped_count} due to errors "
+          f"and {empty_count} without terrain, in '{output_dir}'.")
+    print(f"Manifest of present tiles written to: {manifest_path}")
+    print(f"Tile mapping table written to: {mapping_path}")
 
 
 # --- Main Execution Block --- 
@@ -234,6 +208,11 @@ if __name__ == '__main__':
         type=int, default=default_offset_ty,
         help=f'Vertical offset (ty) of the composite map on the terrain. Default: %(default)s'
     )
+    parser.add_argument(
+        '--cache-dir',
+        default=None,
+        help='Directory of the decoded terrain raster cache. Default: terrain_cache/ next to the terrain image'
+    )
     
     args = parser.parse_args()
 
@@ -276,4 +255,4 @@ if __name__ == '__main__':
 
     # --- Run Generation --- 
     # Use the resolved absolute paths for clarity in function call
-    generate_terrain_tiles(abs_input_dir, abs_terrain_path, args.offset_tx, args.offset_ty) 
\ No newline at end of file
+    generate_terrain_tiles(abs_input_dir, abs_terrain_path, args.offset_tx, args.offset_ty, args.cache_dir) 
\ No newline at end of file
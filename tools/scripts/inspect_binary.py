@@ -1,49 +1,115 @@
 # tools/scripts/inspect_binary.py
 import argparse
+import mmap
 import os
+import numpy as np
 
-def inspect_binary_file(input_filepath, output_dir):
-    """Reads a binary file and outputs hex and ASCII dump files."""
+BYTES_PER_LINE = 16
+ASCII_LINE_WIDTH = 64 # Bytes per line of the ASCII dump
+BLOCK_SIZE = 1 << 20 # Bytes formatted per write; a multiple of both line widths
 
-    base_filename = os.path.basename(input_filepath)
-    hex_output_filename = os.path.splitext(base_filename)[0] + '.hex.txt'
-    ascii_output_filename = os.path.splitext(base_filename)[0] + '.ascii.txt'
+# --- Lookup Tables ---
+HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+HEX_PAIRS = np.stack([HEX_DIGITS[np.arange(256) >> 4], HEX_DIGITS[np.arange(256) & 0xF]], axis=1) # byte -> 2 hex chars
+PRINTABLE = np.where((np.arange(256) >= 32) & (np.arange(256) <= 126), np.arange(256), ord('.')).astype(np.uint8)
 
-    hex_output_path = os.path.join(output_dir, hex_output_filename)
-    ascii_output_path = os.path.join(output_dir, ascii_output_filename)
+# Hex line layout: "oooooooo  hh hh .. hh  |ascii...........|\n"
+OFFSET_DIGITS = 8 # Minimum width of the offset column, widened for dumps past 4 GiB
 
-    bytes_per_line = 16
 
-    try:
-        with open(input_filepath, 'rb') as infile, \
-             open(hex_output_path, 'w') as hex_outfile, \
-             open(ascii_output_path, 'w') as ascii_outfile:
+def offset_digits(end):
+    """Offset column width that fits every line offset below `end`, the same for the whole dump."""
+    return max(OFFSET_DIGITS, len(f'{max(end - 1, 0):x}'))
+
+
+def format_hex_lines(block, base_offset, digits=OFFSET_DIGITS):
+    """Format whole 16-byte lines of `block` (uint8 array) into one bytes object."""
+    hex_column = digits + 2
+    ascii_column = hex_column + BYTES_PER_LINE * 3 + 2
+    byte_columns = hex_column + 3 * np.arange(BYTES_PER_LINE)
+    lines = len(block) // BYTES_PER_LINE
+    rows = block[:lines * BYTES_PER_LINE].reshape(lines, BYTES_PER_LINE)
+    out = np.full((lines, ascii_column + BYTES_PER_LINE + 2), ord(' '), dtype=np.uint8)
+
+    offsets = base_offset + BYTES_PER_LINE * np.arange(lines, dtype=np.int64)
+    shifts = np.arange(4 * (digits - 1), -1, -4, dtype=np.int64)
+    out[:, :digits] = HEX_DIGITS[(offsets[:, None] >> shifts) & 0xF]
+
+    pairs = HEX_PAIRS[rows]
+    out[:, byte_columns] = pairs[:, :, 0]
+    out[:, byte_columns + 1] = pairs[:, :, 1]
 
-            offset = 0
-            while True:
-                chunk = infile.read(bytes_per_line)
-                if not chunk:
-                    break
+    out[:, ascii_column - 1] = ord('|')
+    out[:, ascii_column:ascii_column + BYTES_PER_LINE] = PRINTABLE[rows]
+    out[:, ascii_column + BYTES_PER_LINE] = ord('|')
+    out[:, -1] = ord('\n')
+    return out.tobytes()
 
-                # --- Hex Dump Line ---
-                hex_offset = f'{offset:08x}' # Format offset as 8-digit hex
-                hex_bytes = ' '.join(f'{b:02x}' for b in chunk)
-                # Pad hex bytes if chunk is smaller than bytes_per_line
-                hex_bytes_padded = hex_bytes.ljust(bytes_per_line * 3 - 1)
 
-                # --- ASCII Representation ---
-                ascii_repr = ''.join(chr(b) if 32 <= b <= 126 else '.' for b in chunk)
+def format_hex_tail(chunk, offset, digits=OFFSET_DIGITS):
+    """Format a final line shorter than 16 bytes, padding the hex column."""
+    hex_bytes = ' '.join(f'{b:02x}' for b in chunk).ljust(BYTES_PER_LINE * 3 - 1)
+    ascii_repr = PRINTABLE[np.frombuffer(chunk, dtype=np.uint8)].tobytes().decode('ascii')
+    return f'{offset:0{digits}x}  {hex_bytes}  |{ascii_repr}|\n'.encode('ascii')
 
-                # Write hex line
-                hex_outfile.write(f'{hex_offset}  {hex_bytes_padded}  |{ascii_repr}|\\n')
 
-                # --- ASCII Dump Line ---
-                ascii_outfile.write(ascii_repr)
-                # Add newline occasionally to ascii dump for readability
-                if offset % (bytes_per_line * 4) == 0 and offset > 0:
-                    ascii_outfile.write('\\n')
+def format_ascii_lines(block):
+    """Map `block` to printable characters, ASCII_LINE_WIDTH per line."""
+    printable = PRINTABLE[block]
+    lines = len(block) // ASCII_LINE_WIDTH
+    out = np.empty((lines, ASCII_LINE_WIDTH + 1), dtype=np.uint8)
+    out[:, :-1] = printable[:lines * ASCII_LINE_WIDTH].reshape(lines, ASCII_LINE_WIDTH)
+    out[:, -1] = ord('\n')
+    tail = printable[lines * ASCII_LINE_WIDTH:].tobytes()
+    return out.tobytes() + (tail + b'\n' if tail else b'')
 
-                offset += len(chunk)
+
+def inspect_binary_file(input_filepath, output_dir, offset=0, length=None):
+    """Reads a binary file (or a range of it) and outputs hex and ASCII dump files."""
+
+    base_filename = os.path.basename(input_filepath)
+    hex_output_filename = os.path.splitext(base_filename)[0] + '.hex.txt'
+    ascii_output_filename = os.path.splitext(base_filename)[0] + '.ascii.txt'
+
+    hex_output_path = os.path.join(output_dir, hex_output_filename)
+    ascii_output_path = os.path.join(output_dir, ascii_output_filename)
+
+    try:
+        with open(input_filepath, 'rb') as infile:
+            # Validate the range before the outputs are opened (and truncated)
+            file_size = os.fstat(infile.fileno()).st_size
+            if offset < 0 or offset > file_size:
+                print(f"Error: Offset {offset} is outside the file ({file_size} bytes)")
+                return
+            if length is not None and length < 0:
+                print(f"Error: Length {length} is negative")
+                return
+            end = file_size if length is None else min(file_size, offset + length)
+            digits = offset_digits(end)
+
+            with open(hex_output_path, 'wb') as hex_outfile, \
+                 open(ascii_output_path, 'wb') as ascii_outfile:
+                # Only the requested range is paged in from the mapping
+                data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) if file_size else b''
+                try:
+                    position = offset
+                    block = None
+                    while position < end:
+                        block_end = min(end, position + BLOCK_SIZE)
+                        block = np.frombuffer(data, dtype=np.uint8, count=block_end - position, offset=position)
+
+                        whole = len(block) - len(block) % BYTES_PER_LINE
+                        hex_outfile.write(format_hex_lines(block, position, digits))
+                        if whole < len(block):
+                            hex_outfile.write(format_hex_tail(block[whole:].tobytes(), position + whole, digits))
+                        # Blocks are a multiple of ASCII_LINE_WIDTH, so only the last one has a short line
+                        ascii_outfile.write(format_ascii_lines(block))
+
+                        position = block_end
+                    block = None # Release the view before the mapping is closed
+                finally:
+                    if file_size:
+                        data.close()
 
         print(f"Successfully created hex dump: {hex_output_path}")
         print(f"Successfully created ASCII dump: {ascii_output_path}")
@@ -58,10 +124,14 @@ if __name__ == "__main__":
     parser.add_argument('input_file', help='Path to the input binary file.')
     parser.add_argument('-o', '--output_dir', default='./output',
                         help='Directory to save the output files (default: ./output).')
+    parser.add_argument('--offset', type=lambda v: int(v, 0), default=0,
+                        help='Start of the range to dump, decimal or 0x-prefixed hex (default: 0).')
+    parser.add_argument('--length', type=lambda v: int(v, 0), default=None,
+                        help='Number of bytes to dump (default: up to the end of the file).')
 
     args = parser.parse_args()
 
     # Ensure output directory exists
     os.makedirs(args.output_dir, exist_ok=True)
 
-    inspect_binary_file(args.input_file, args.output_dir)
\ No newline at end of file
+    inspect_binary_file(args.input_file, args.output_dir, args.offset, args.length)
@@ -0,0 +1,251 @@
+# tools/scripts/profile_binary.py
+import argparse
+import mmap
+import os
+import sys
+import time
+import numpy as np
+
+DEFAULT_WINDOW = 1024
+DEFAULT_STEP = 256
+CHUNK_BYTES = 1 << 22 # Bytes histogrammed per bincount call
+CHART_WIDTH = 1024
+MAX_REPORT_REGIONS = 40
+
+PRINTABLE_BYTES = np.zeros(256, dtype=bool)
+PRINTABLE_BYTES[32:127] = True
+PRINTABLE_BYTES[[9, 10, 13]] = True
+
+
+def _count_log_table(window):
+    """c * log2(c) for every count 0..window, so entropy is a table lookup plus a row sum."""
+    counts = np.arange(window + 1, dtype=np.float64)
+    table = np.zeros(window + 1)
+    table[1:] = counts[1:] * np.log2(counts[1:])
+    return table
+
+
+def iter_block_histograms(data, block_size, chunk_bytes=CHUNK_BYTES):
+    """Yield (n, 256) byte histograms of consecutive `block_size` blocks, a chunk of blocks at a time.
+
+    Each chunk is a strided (blocks, block_size) view of the buffer; one bincount over
+    block_index * 256 + byte counts every block at once.
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    total_blocks = len(arr) // block_size
+    blocks_per_chunk = max(1, chunk_bytes // block_size)
+    for first in range(0, total_blocks, blocks_per_chunk):
+        n = min(blocks_per_chunk, total_blocks - first)
+        blocks = arr[first * block_size:(first + n) * block_size].reshape(n, block_size)
+        keys = (np.arange(n, dtype=np.int64)[:, None] << 8) | blocks
+        yield np.bincount(keys.ravel(), minlength=n * 256).reshape(n, 256)
+
+
+def profile_bytes(data, window=DEFAULT_WINDOW, step=DEFAULT_STEP, chart_width=CHART_WIDTH):
+    """Sliding-window byte statistics of a buffer.
+
+    Returns a dict with per-window arrays 'offsets', 'entropy' (bits/byte),
+    'nonzero' and 'printable' ratios, the whole-file 'histogram', and 'columns':
+    per-column byte histograms (at most `chart_width` columns) for the strip chart.
+    The window must be a multiple of the step; windows advance one step at a time.
+    Only full windows are scored: 'windowed_end' is the end of the last one, and
+    the trailing bytes after it are counted in 'histogram' only.
+    """
+    if window % step:
+        raise ValueError(f"Window {window} is not a multiple of step {step}")
+    arr = np.frombuffer(data, dtype=np.uint8)
+    per_window = window // step
+    total_blocks = len(arr) // step
+    n_windows = max(0, total_blocks - per_window + 1)
+    log_table = _count_log_table(window)
+
+    entropy = np.empty(n_windows)
+    nonzero = np.empty(n_windows)
+    printable = np.empty(n_windows)
+    histogram = np.bincount(arr[total_blocks * step:], minlength=256).astype(np.int64) # Tail bytes
+    n_columns = min(chart_width, total_blocks)
+    columns = np.zeros((n_columns, 256), dtype=np.int64)
+
+    carry = np.zeros((0, 256), dtype=np.int64) # Last per_window - 1 block histograms of the previous chunk
+    first_block = 0
+    done = 0
+    for block_hist in iter_block_histograms(data, step):
+        n = len(block_hist)
+        histogram += block_hist.sum(axis=0)
+        column_idx = (np.arange(first_block, first_block + n) * n_columns) // total_blocks
+        np.add.at(columns, column_idx, block_hist)
+        first_block += n
+
+        # Window histograms are differences of a running sum over blocks
+        stacked = np.concatenate([carry, block_hist])
+        if len(stacked) >= per_window:
+            cumulative = np.concatenate([np.zeros((1, 256), dtype=np.int64), np.cumsum(stacked, axis=0)])
+            windows = cumulative[per_window:] - cumulative[:-per_window]
+            count = len(windows)
+            entropy[done:done + count] = np.log2(window) - log_table[windows].sum(axis=1) / window
+            nonzero[done:done + count] = 1.0 - windows[:, 0] / window
+            printable[done:done + count] = windows[:, PRINTABLE_BYTES].sum(axis=1) / window
+            done += count
+        carry = stacked[len(stacked) - (per_window - 1):] if per_window > 1 else carry
+
+    return {
+        'size': len(arr),
+        'window': window,
+        'step': step,
+        'offsets': np.arange(n_windows, dtype=np.int64) * step,
+        'windowed_end': (n_windows - 1) * step + window if n_windows else 0,
+        'entropy': entropy,
+        'nonzero': nonzero,
+        'printable': printable,
+        'histogram': histogram,
+        'columns': columns,
+    }
+
+
+def classify_windows(profile):
+    """Label each window: zero, text, random (compressed/encrypted), sparse or mixed."""
+    labels = np.full(len(profile['entropy']), 'mixed', dtype='<U6')
+    labels[profile['entropy'] < 3.0] = 'sparse'
+    labels[profile['entropy'] > 7.2] = 'random'
+    labels[profile['printable'] > 0.9] = 'text'
+    labels[profile['nonzero'] < 0.05] = 'zero'
+    return labels
+
+
+def find_regions(profile):
+    """Merge consecutive windows with the same label into (start, end, label, entropy, nonzero) regions."""
+    labels = classify_windows(profile)
+    if len(labels) == 0:
+        return []
+    boundaries = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(labels)]])
+    regions = []
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        end_offset = profile['windowed_end'] if e == len(labels) else int(profile['offsets'][e])
+        regions.append((int(profile['offsets'][s]), end_offset, str(labels[s]),
+                        float(profile['entropy'][s:e].mean()), float(profile['nonzero'][s:e].mean())))
+    return regions
+
+
+def repeated_prefix_counts(data, min_length=4, max_length=19):
+    """Count (overlapping) occurrences of each prefix length of the file in one vectorized pass."""
+    arr = np.frombuffer(data, dtype=np.uint8)
+    counts = {}
+    if len(arr) < min_length:
+        return counts
+    # Candidates match the first min_length bytes, found with a boolean mask over shifted
+    # slices so only the matching positions are materialized; longer prefixes narrow them
+    n = len(arr) - min_length + 1
+    match = arr[:n] == arr[0]
+    for i in range(1, min_length):
+        match &= arr[i:i + n] == arr[i]
+    positions = np.flatnonzero(match)
+    del match
+    counts[min_length] = len(positions)
+    for length in range(min_length + 1, min(max_length, len(arr)) + 1):
+        positions = positions[positions + length <= len(arr)]
+        positions = positions[arr[positions + length - 1] == arr[length - 1]]
+        counts[length] = len(positions)
+    return counts
+
+
+def format_report(profile, name="", top_bytes=8):
+    """Compact text report: overall statistics, most common bytes and labeled regions."""
+    size = profile['size']
+    histogram = profile['histogram']
+    lines = [f"File: {name} ({size} bytes), window {profile['window']}, step {profile['step']}, "
+             f"{len(profile['entropy'])} windows"]
+    if size:
+        p = histogram[histogram > 0] / size
+        overall = float(-(p * np.log2(p)).sum())
+        lines.append(f"Overall entropy: {overall:.2f} bits/byte, zero bytes {histogram[0] / size:.1%}, "
+                     f"printable {histogram[PRINTABLE_BYTES].sum() / size:.1%}")
+        order = np.argsort(histogram)[::-1][:top_bytes]
+        lines.append("Top bytes: " + ", ".join(f"{b:02x} ({histogram[b] / size:.1%})" for b in order.tolist() if histogram[b]))
+
+    if size > profile['windowed_end']:
+        lines.append(f"Trailing {size - profile['windowed_end']} bytes after the last full window "
+                     f"(0x{profile['windowed_end']:08x}-0x{size:08x}) are not scored")
+
+    regions = find_regions(profile)
+    lines.append(f"Regions ({len(regions)}):")
+    for start, end, label, ent, nz in regions[:MAX_REPORT_REGIONS]:
+        lines.append(f"  0x{start:08x}-0x{end:08x}  {label:<6}  entropy {ent:4.2f}  nonzero {nz:4.0%}")
+    if len(regions) > MAX_REPORT_REGIONS:
+        lines.append(f"  ... and {len(regions) - MAX_REPORT_REGIONS} more regions")
+    return "\n".join(lines)
+
+
+def _heat_colors(values):
+    """Map values in [0, 1] to a blue -> green -> yellow -> red ramp, as uint8 RGB."""
+    stops = np.array([[20, 30, 120], [30, 160, 90], [240, 220, 40], [210, 40, 30]], dtype=np.float64)
+    x = np.clip(values, 0, 1) * (len(stops) - 1)
+    return np.stack([np.interp(x, np.arange(len(stops)), stops[:, c]) for c in range(3)], axis=-1).astype(np.uint8)
+
+
+def _resample(values, width):
+    """Average a per-window series into `width` columns (repeating values if there are fewer)."""
+    if len(values) == 0:
+        return np.zeros(width)
+    if len(values) < width:
+        return values[(np.arange(width) * len(values)) // width]
+    edges = (np.arange(width + 1) * len(values)) // width
+    return np.add.reduceat(values, edges[:-1]) / np.diff(edges)
+
+
+def save_strip_chart(profile, output_path, band_height=24):
+    """Write a PNG strip chart: entropy, nonzero and printable bands over a byte-value heatmap."""
+    from PIL import Image # Only needed for the chart
+
+    columns = profile['columns']
+    width = max(1, len(columns))
+    bands = [
+        _heat_colors(_resample(profile['entropy'], width) / 8.0),
+        _heat_colors(_resample(profile['nonzero'], width)),
+        _heat_colors(_resample(profile['printable'], width)),
+    ]
+    rows = [np.repeat(band[None, :, :], band_height, axis=0) for band in bands]
+
+    # Byte value heatmap (row = byte value, 0 at the top), log-scaled per column
+    if len(columns):
+        heat = np.log1p(columns.T.astype(np.float64))
+        heat /= np.maximum(heat.max(axis=0, keepdims=True), 1e-9)
+        rows.append(np.repeat((heat * 255).astype(np.uint8)[:, :, None], 3, axis=2))
+    separator = np.full((2, width, 3), 255, dtype=np.uint8)
+    image = np.concatenate([part for row in rows for part in (row, separator)][:-1], axis=0)
+    Image.fromarray(image, 'RGB').save(output_path)
+
+
+def profile_file(filepath, window=DEFAULT_WINDOW, step=DEFAULT_STEP, chart_path=None):
+    """Profile a file over mmap, print the report and optionally write the strip chart."""
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        try:
+            profile = profile_bytes(data, window, step)
+        finally:
+            if size:
+                data.close()
+    print(format_report(profile, os.path.basename(filepath)))
+    if chart_path:
+        save_strip_chart(profile, chart_path)
+        print(f"Strip chart written to {chart_path}")
+    return profile
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Windowed entropy / byte histogram profile of a binary file.')
+    parser.add_argument('input_file', help='Path to the binary file.')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help=f'Window size in bytes (default: {DEFAULT_WINDOW}).')
+    parser.add_argument('--step', type=int, default=DEFAULT_STEP, help=f'Window step in bytes, must divide the window (default: {DEFAULT_STEP}).')
+    parser.add_argument('--chart', metavar='PNG', help='Write a PNG strip chart to this path.')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        profile_file(args.input_file, args.window, args.step, args.chart)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Profiled in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -1,21 +1,93 @@
 import os
-from PIL import Image
 import sys
 import math
 import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from terrain_cache import load_terrain, clip_box, tile_image, write_tile_manifest
+from terrain_pyramid import build_pyramid
+
+def tile_jobs(cropped_width, cropped_height, tile_width, tile_height):
+    """Yield (tile_x_idx, tile_y_idx, px, py, slice_width, slice_height) for every tile.
+    (0,0) is the bottom-left tile; (px, py) is the top-left corner of its slice in the crop.
+    """
+    num_x_tiles = math.ceil(cropped_width / tile_width)
+    num_y_tiles = math.ceil(cropped_height / tile_height)
+    for tile_y_idx in range(num_y_tiles): # tile_y_idx 0 is bottom row
+        for tile_x_idx in range(num_x_tiles): # tile_x_idx 0 is left column
+            px = tile_x_idx * tile_width
+            # The top edge of the slice for the bottom row (idx=0) is total_height - tile_height,
+            # clamped to 0 for a partial top row
+            py = max(0, cropped_height - (tile_y_idx + 1) * tile_height)
+            # Partial top row / right column slices are smaller than the tile
+            slice_height = min(tile_height, cropped_height - py)
+            slice_width = min(tile_width, cropped_width - px)
+            yield tile_x_idx, tile_y_idx, px, py, slice_width, slice_height
+
+def save_tile(terrain, crop_box, job, tile_width, tile_height, output_dir):
+    """Cut one tile of the crop box from the terrain raster and save it. Returns None or an error message."""
+    tile_x_idx, tile_y_idx, px, py, slice_width, slice_height = job
+    slice_box = (px, py, px + slice_width, py + slice_height)
+    if slice_width <= 0 or slice_height <= 0:
+        return f"Warning: Skipping tile ({tile_x_idx},{tile_y_idx}) due to zero slice dimension."
+
+    try:
+        # Full tile-sized box at the slice origin; the part beyond the crop (partial top row /
+        # right column) stays transparent. Interior tiles are taken straight from the raster.
+        image = tile_image(terrain, crop_box[0] + px, crop_box[1] + py, tile_width, tile_height, bounds=crop_box)
+    except Exception as e:
+        return f"Error slicing tile ({tile_x_idx},{tile_y_idx}) with box {slice_box}: {e}"
+
+    output_path = os.path.join(output_dir, f"{tile_x_idx}-{tile_y_idx}-terrain.png")
+    try:
+        image.save(output_path)
+    except Exception as e:
+        return f"Error saving tile {output_path}: {e}"
+    return None
+
+# --- Worker Processes ---
+_worker_state = {}
+
+def _init_worker(raster_path, crop_box, tile_width, tile_height, output_dir):
+    """Map the cached terrain raster once per worker process."""
+    terrain = np.load(raster_path, mmap_mode='r')
+    _worker_state['args'] = (terrain, crop_box, tile_width, tile_height, output_dir)
+
+def _slice_job(job):
+    terrain, crop_box, tile_width, tile_height, output_dir = _worker_state['args']
+    return save_tile(terrain, crop_box, job, tile_width, tile_height, output_dir)
+
+def _report_results(jobs, results):
+    """Print errors and progress for the save_tile results of `jobs`. Returns the (x, y) of the saved tiles."""
+    saved = []
+    for job, error in zip(jobs, results):
+        if error:
+            print(f"\n{error}")
+            continue
+        saved.append(job[:2])
+        if len(saved) % 50 == 0:
+            print(f"  Saved {len(saved)} tiles...", end='\r')
+    return saved
 
 def slice_terrain_image(terrain_path, output_dir, crop_origin_x, crop_origin_y, 
-                        output_width, output_height, tile_width, tile_height):
+                        output_width, output_height, tile_width, tile_height, cache_dir=None, workers=1, pyramid_dir=None):
     """Crops the terrain image based on origin and dimensions, then slices it into tiles.
     Handles cases where the requested output dimensions exceed terrain boundaries after cropping.
     Tiles are named X-Y-terrain.png with (0,0) being the bottom-left tile.
+    The crop box is clipped to the terrain and the grid is ceil(crop / tile), so
+    every tile overlaps terrain (none are skipped as empty); terrain_manifest.json
+    lists the tiles written.
+    The terrain is read from the memory-mapped raster cache (see terrain_cache.py);
+    with workers > 1 the tiles are cut and encoded in parallel from that mapping.
+    With pyramid_dir set, a 256px XYZ pyramid of the same crop is written there too
+    (see terrain_pyramid.py).
     """
     
     # --- Load Terrain Image --- 
     try:
         print(f"Loading terrain image: {terrain_path}")
-        terrain_img = Image.open(terrain_path).convert('RGBA')
-        terrain_w, terrain_h = terrain_img.size
+        terrain = load_terrain(terrain_path, cache_dir)
+        terrain_h, terrain_w = terrain.shape[:2]
         print(f"Terrain dimensions: {terrain_w}x{terrain_h}")
     except FileNotFoundError:
         print(f"Error: Terrain image not found at {terrain_path}")
@@ -33,10 +105,8 @@ def slice_terrain_image(terrain_path, output_dir, crop_origin_x, crop_origin_y,
     crop_box_bottom_ideal = crop_origin_y + output_height
     
     # Intersect the ideal crop box with the actual terrain boundaries
-    actual_crop_left = max(0, crop_box_left)
-    actual_crop_top = max(0, crop_box_top)
-    actual_crop_right = min(terrain_w, crop_box_right_ideal)
-    actual_crop_bottom = min(terrain_h, crop_box_bottom_ideal)
+    actual_crop_left, actual_crop_top, actual_crop_right, actual_crop_bottom = clip_box(
+        terrain, crop_box_left, crop_box_top, crop_box_right_ideal, crop_box_bottom_ideal)
 
     # Calculate the dimensions of the actual cropped area
     actual_cropped_width = actual_crop_right - actual_crop_left
@@ -54,13 +124,9 @@ def slice_terrain_image(terrain_path, output_dir, crop_origin_x, crop_origin_y,
     print(f"Actual cropped area size due to terrain boundaries: {actual_cropped_width}x{actual_cropped_height}")
     
     # --- Crop the Terrain --- 
+    # Tiles are cut from the cached raster within this box; pixels are only read when a tile is cut
     actual_crop_box = (actual_crop_left, actual_crop_top, actual_crop_right, actual_crop_bottom)
-    try:
-        print(f"Cropping terrain using box: {actual_crop_box}")
-        cropped_terrain = terrain_img.crop(actual_crop_box)
-    except Exception as e:
-        print(f"Error cropping terrain image: {e}")
-        return False
+    print(f"Cropping terrain using box: {actual_crop_box}")
         
     # --- Prepare Output Directory --- 
     os.makedirs(output_dir, exist_ok=True)
@@ -71,61 +137,26 @@ def slice_terrain_image(terrain_path, output_dir, crop_origin_x, crop_origin_y,
     num_y_tiles = math.ceil(actual_cropped_height / tile_height)
     print(f"Creating tile grid: {num_x_tiles} columns x {num_y_tiles} rows")
 
-    generated_count = 0
-    # --- Iterate and Slice Tiles (Origin Bottom-Left) --- 
-    for tile_y_idx in range(num_y_tiles): # tile_y_idx 0 is bottom row
-        for tile_x_idx in range(num_x_tiles): # tile_x_idx 0 is left column
-            
-            # Calculate the top-left pixel coordinate (px, py) for slicing from cropped_terrain
-            px = tile_x_idx * tile_width
-            
-            # Calculate py (top coordinate) based on bottom-up indexing (tile_y_idx=0 is bottom)
-            # The top edge of the slice for the bottom row (idx=0) is total_height - tile_height
-            # The top edge for the row above (idx=1) is total_height - 2*tile_height, etc.
-            py = actual_cropped_height - (tile_y_idx + 1) * tile_height
-            # Ensure py doesn't go below 0 for the top row if height isn't multiple of tile_height
-            py = max(0, py) 
-            
-            # Calculate the actual height of this slice (handles partial top row)
-            slice_height = min(tile_height, actual_cropped_height - py)
-            # Calculate the actual width of this slice (handles partial right column)
-            slice_width = min(tile_width, actual_cropped_width - px)
-            
-            # Define the box to slice from the cropped_terrain image
-            slice_box = (px, py, px + slice_width, py + slice_height)
-            
-            if slice_width <= 0 or slice_height <= 0:
-                print(f"Warning: Skipping tile ({tile_x_idx},{tile_y_idx}) due to zero slice dimension.")
-                continue # Should not happen with ceil logic, but safety check
-
-            # Create the actual tile image (using requested tile size, may have empty areas)
-            # Fill with transparency first
-            tile_image = Image.new('RGBA', (tile_width, tile_height), (0, 0, 0, 0))
-
-            try:
-                # Slice the part from the cropped terrain
-                tile_content = cropped_terrain.crop(slice_box)
-                
-                # Paste the sliced content onto the top-left of the transparent tile_image
-                # (The content size might be smaller than tile_width/tile_height for edge tiles)
-                tile_image.paste(tile_content, (0, 0)) 
-                
-            except Exception as e:
-                print(f"\nError slicing or pasting for tile ({tile_x_idx},{tile_y_idx}) with box {slice_box}: {e}")
-                continue # Skip saving this tile
-                
-            # --- Save Tile --- 
-            output_filename = f"{tile_x_idx}-{tile_y_idx}-terrain.png"
-            output_path = os.path.join(output_dir, output_filename)
-            try:
-                tile_image.save(output_path)
-                generated_count += 1
-                if generated_count % 50 == 0:
-                     print(f"  Saved {generated_count} tiles...", end='\r')
-            except Exception as e:
-                print(f"\nError saving tile {output_path}: {e}")
-
-    print(f"\nFinished. Saved {generated_count} terrain tiles to '{output_dir}'.")
+    jobs = list(tile_jobs(actual_cropped_width, actual_cropped_height, tile_width, tile_height))
+    if workers > 1:
+        # Workers map the cached raster themselves, so only tile boxes are sent to them
+        print(f"Slicing with {workers} worker processes...")
+        initargs = (terrain.filename, actual_crop_box, tile_width, tile_height, output_dir)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+            results = executor.map(_slice_job, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+            saved_tiles = _report_results(jobs, results)
+    else:
+        results = (save_tile(terrain, actual_crop_box, job, tile_width, tile_height, output_dir) for job in jobs)
+        saved_tiles = _report_results(jobs, results)
+
+    manifest_path = write_tile_manifest(output_dir, saved_tiles, tile_width, tile_height, crop_box=list(actual_crop_box))
+    print(f"\nFinished. Saved {len(saved_tiles)} terrain tiles to '{output_dir}'.")
+    print(f"Manifest of present tiles written to: {manifest_path}")
+
+    # --- Build XYZ Pyramid --- 
+    if pyramid_dir:
+        print(f"Building XYZ tile pyramid in: {pyramid_dir}")
+        build_pyramid(terrain, actual_crop_box, pyramid_dir, workers=workers)
     return True
 
 # --- Main Execution Block --- 
@@ -187,6 +218,21 @@ if __name__ == '__main__':
         type=int, default=default_tile_h,
         help='Height of each output tile. Default: %(default)s'
     )
+    parser.add_argument(
+        '--cache-dir',
+        default=None,
+        help='Directory of the decoded terrain raster cache. Default: terrain_cache/ next to the terrain image'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int, default=1,
+        help='Number of processes cutting and encoding tiles in parallel (threads for the pyramid). Default: %(default)s'
+    )
+    parser.add_argument(
+        '--pyramid-dir',
+        default=None,
+        help='Also write a 256px XYZ tile pyramid ({z}/{x}/{y}.png) of the cropped area to this directory.'
+    )
 
     args = parser.parse_args()
 
@@ -196,6 +242,8 @@ if __name__ == '__main__':
     print(f"Crop Origin (X,Y): ({args.crop_x}, {args.crop_y})")
     print(f"Desired Crop Size (W,H): ({args.out_w}, {args.out_h})")
     print(f"Tile Size (W,H):  ({args.tile_w}, {args.tile_h})")
+    print(f"Workers:          {args.workers}")
+    print(f"Pyramid Directory: {args.pyramid_dir or 'None'}")
     print("----------------")
 
     # --- Validate Paths --- 
@@ -223,7 +271,10 @@ if __name__ == '__main__':
         output_width=args.out_w, 
         output_height=args.out_h, 
         tile_width=args.tile_w, 
-        tile_height=args.tile_h
+        tile_height=args.tile_h,
+        cache_dir=args.cache_dir,
+        workers=args.workers,
+        pyramid_dir=os.path.abspath(args.pyramid_dir) if args.pyramid_dir else None
     )
 
     if not success:
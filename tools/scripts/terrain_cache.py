@@ -0,0 +1,188 @@
+# tools/scripts/terrain_cache.py
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import numpy as np
+from PIL import Image
+
+HASH_CHUNK = 1 << 20
+CACHE_DIR_NAME = 'terrain_cache' # Created next to the terrain image by default
+MANIFEST_FILENAME = 'terrain_manifest.json'
+
+
+def hash_file(path):
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_cache_dir(terrain_path):
+    return os.path.join(os.path.dirname(os.path.abspath(terrain_path)), CACHE_DIR_NAME)
+
+
+def cache_path_for(terrain_path, cache_dir=None):
+    """Path of the decoded raster for the current content of `terrain_path`: <name>-<hash>.npy."""
+    cache_dir = cache_dir or default_cache_dir(terrain_path)
+    return os.path.join(cache_dir, f"{_cache_prefix(terrain_path)}{hash_file(terrain_path)}.npy")
+
+
+def _cache_prefix(terrain_path):
+    return os.path.splitext(os.path.basename(terrain_path))[0] + '-'
+
+
+def prune_cache(terrain_path, cache_path):
+    """Delete the rasters of older revisions of `terrain_path` next to `cache_path`.
+
+    Only <name>-*.npy files of the same image are removed, so other images sharing
+    the cache directory keep theirs. Files still mapped elsewhere (Windows) are left.
+    """
+    cache_dir = os.path.dirname(cache_path)
+    prefix = _cache_prefix(terrain_path)
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(prefix) and name.endswith('.npy') and path != cache_path:
+            try:
+                os.remove(path)
+                print(f"Removed outdated terrain cache: {path}")
+            except OSError as e:
+                print(f"Warning: Could not remove outdated terrain cache {path}: {e}")
+
+
+def decode_to_cache(terrain_path, cache_path):
+    """Decode the image once into an RGBA .npy at `cache_path` (written atomically)."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    # The terrain map is far larger than PIL's decompression bomb limit; lift it
+    # for this trusted image only
+    max_pixels = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        with Image.open(terrain_path) as img:
+            rgba = img.convert('RGBA')
+    finally:
+        Image.MAX_IMAGE_PIXELS = max_pixels
+    raster = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8, shape=(rgba.height, rgba.width, 4))
+    raster[:] = np.asarray(rgba)
+    raster.flush()
+    del raster, rgba
+    os.replace(tmp_path, cache_path)
+    prune_cache(terrain_path, cache_path)
+
+
+def load_terrain(terrain_path, cache_dir=None):
+    """Return the terrain as a read-only (height, width, 4) uint8 memmap.
+
+    The image is decoded on the first call for its content and stored as
+    <name>-<hash>.npy in `cache_dir` (default: terrain_cache/ next to the image),
+    replacing the raster of its previous content; later calls only hash the
+    file and map the raster, so nothing is decoded or copied until pixels are
+    actually read.
+    """
+    cache_path = cache_path_for(terrain_path, cache_dir)
+    if not os.path.exists(cache_path):
+        print(f"Decoding {os.path.basename(terrain_path)} into cache: {cache_path}")
+        decode_to_cache(terrain_path, cache_path)
+    return np.load(cache_path, mmap_mode='r')
+
+
+def clip_box(raster, left, top, right, bottom):
+    """Intersect a box with the raster bounds. Returns (left, top, right, bottom), possibly empty."""
+    height, width = raster.shape[:2]
+    return max(0, left), max(0, top), min(width, right), min(height, bottom)
+
+
+def crop_view(raster, left, top, right, bottom):
+    """Zero-copy view of the part of the box inside the raster (may be empty)."""
+    left, top, right, bottom = clip_box(raster, left, top, right, bottom)
+    return raster[top:max(top, bottom), left:max(left, right)]
+
+
+def composite_origin(x, y, min_x, max_y, tile_width, tile_height):
+    """Top-left pixel of grid tile (x, y) in the stitched composite (Y inverted: max_y is the top row).
+
+    Works element-wise on numpy arrays of x and y as well.
+    """
+    return (x - min_x) * tile_width, (max_y - y) * tile_height
+
+
+def write_tile_manifest(output_dir, tiles, tile_width, tile_height, **info):
+    """Write terrain_manifest.json listing the (x, y) of the X-Y-terrain.png tiles present in `output_dir`.
+
+    Tiles without terrain are not written, so a missing tile is fully transparent.
+    Extra keyword arguments are stored alongside. Returns the manifest path.
+    """
+    manifest = dict(info, tile_width=tile_width, tile_height=tile_height,
+                    tiles=[[int(x), int(y)] for x, y in sorted(tiles)])
+    path = os.path.join(output_dir, MANIFEST_FILENAME)
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+def _padded_tile(raster, left, top, width, height, bounds):
+    """Transparent (height, width, 4) buffer with the part of the box inside `bounds` copied in."""
+    tile = np.zeros((height, width, 4), dtype=np.uint8)
+    l, t = max(left, bounds[0]), max(top, bounds[1])
+    r, b = min(left + width, bounds[2]), min(top + height, bounds[3])
+    if r > l and b > t:
+        tile[t - top:b - top, l - left:r - left] = raster[t:b, l:r]
+    return tile
+
+
+def _tile_bounds(raster, left, top, width, height, bounds):
+    """Clip `bounds` (default: the whole raster) to the raster; also report whether the box lies inside."""
+    height_r, width_r = raster.shape[:2]
+    bounds = clip_box(raster, *(bounds or (0, 0, width_r, height_r)))
+    inside = (left >= bounds[0] and top >= bounds[1] and
+              left + width <= bounds[2] and top + height <= bounds[3])
+    return bounds, inside
+
+
+def tile_array(raster, left, top, width, height, bounds=None):
+    """(height, width, 4) pixels of a box; pixels outside `bounds` (default: the raster) are transparent.
+
+    Interior boxes are returned as views of the raster; only edge tiles get a
+    padded buffer.
+    """
+    bounds, inside = _tile_bounds(raster, left, top, width, height, bounds)
+    if inside:
+        return raster[top:top + height, left:left + width]
+    return _padded_tile(raster, left, top, width, height, bounds)
+
+
+def tile_image(raster, left, top, width, height, bounds=None):
+    """Same box as tile_array, as a PIL RGBA image ready to be encoded.
+
+    For interior boxes the full-width row band is mapped into PIL without a copy
+    and cropped there, so the only pixel copy is the one PIL encodes from; edge
+    tiles map their padded buffer.
+    """
+    bounds, inside = _tile_bounds(raster, left, top, width, height, bounds)
+    if not inside:
+        tile = _padded_tile(raster, left, top, width, height, bounds)
+        return Image.frombuffer('RGBA', (width, height), tile, 'raw', 'RGBA', 0, 1)
+    band = Image.frombuffer('RGBA', (raster.shape[1], height), raster[top:top + height], 'raw', 'RGBA', 0, 1)
+    return band if width == raster.shape[1] else band.crop((left, 0, left + width, height))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Decode a terrain image into the memory-mapped raster cache.')
+    parser.add_argument('terrain', help='Path to the terrain image.')
+    parser.add_argument('--cache-dir', help=f'Cache directory (default: {CACHE_DIR_NAME}/ next to the image).')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        raster = load_terrain(args.terrain, args.cache_dir)
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Terrain raster: {raster.shape[1]}x{raster.shape[0]} RGBA ({raster.nbytes / 2**20:.1f} MiB), "
+          f"ready in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"Cache file: {raster.filename}")
@@ -0,0 +1,144 @@
+# tools/scripts/terrain_pyramid.py
+import json
+import math
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+from terrain_cache import tile_array
+
+PYRAMID_TILE_SIZE = 256
+METADATA_FILENAME = 'pyramid.json'
+
+
+def max_zoom_for(width, height, tile_size=PYRAMID_TILE_SIZE):
+    """Smallest zoom whose 2^z x 2^z grid of tiles covers a width x height image at full resolution."""
+    return max(0, math.ceil(math.log2(max(width, height) / tile_size)))
+
+
+def downsample_2x(band):
+    """Halve a (2h, 2w, 4) RGBA band with a 2x2 box filter.
+
+    Colour is averaged weighted by alpha, so transparent padding does not darken
+    the edges of the terrain.
+    """
+    pixels = band.astype(np.uint32)
+    alpha = pixels[..., 3:4]
+    premultiplied = pixels[..., :3] * alpha
+
+    def pool(a):
+        return a[0::2, 0::2] + a[1::2, 0::2] + a[0::2, 1::2] + a[1::2, 1::2]
+
+    alpha_sum = pool(alpha)
+    colour_sum = pool(premultiplied)
+    out = np.empty(alpha_sum.shape[:2] + (4,), dtype=np.uint8)
+    out[..., :3] = (colour_sum + alpha_sum // 2) // np.maximum(alpha_sum, 1)
+    out[..., 3] = (alpha_sum[..., 0] + 2) // 4
+    return out
+
+
+class _Level:
+    """Row band accumulator of one zoom level: collects half-height bands from the level above."""
+
+    def __init__(self, zoom, columns, tile_size):
+        self.zoom = zoom
+        self.columns = columns
+        self.band = np.zeros((tile_size, columns * tile_size, 4), dtype=np.uint8)
+        self.filled = 0 # rows of `band` written since the last emitted tile row
+        self.row = 0 # y of the next tile row
+
+    def push(self, half):
+        rows, width = half.shape[:2]
+        self.band[self.filled:self.filled + rows, :width] = half
+        self.band[self.filled:self.filled + rows, width:] = 0
+        self.filled += rows
+
+
+def build_pyramid(terrain, crop_box, output_dir, tile_size=PYRAMID_TILE_SIZE, workers=1):
+    """Write an XYZ pyramid ({z}/{x}/{y}.png, y=0 at the top) of `crop_box` of the terrain raster.
+
+    The top-left corner of the crop box is the origin of every level, which is
+    also the top-left corner of the minimap composite, and the highest zoom is
+    at full resolution. Tiles of the highest zoom are cut from the raster one
+    row band at a time; each band is halved and handed down to the next zoom,
+    which emits its own band when it has collected a tile row. Only one band
+    per level is held in memory. Zoom directories left by an earlier run are
+    removed first, so no stale tile outlives a smaller crop box. Returns the
+    number of tiles written.
+    """
+    left, top, right, bottom = crop_box
+    width, height = right - left, bottom - top
+    max_zoom = max_zoom_for(width, height, tile_size)
+
+    levels = {}
+    for zoom in range(max_zoom, -1, -1):
+        scale = 2 ** (max_zoom - zoom)
+        levels[zoom] = _Level(zoom, math.ceil(width / scale / tile_size), tile_size)
+    rows = math.ceil(height / tile_size)
+
+    _clear_levels(output_dir)
+    _write_metadata(output_dir, crop_box, tile_size, max_zoom)
+    written = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor: # PNG encoding releases the GIL
+        def emit(level, band):
+            """Save one tile row of `level` and pass its halved band down."""
+            nonlocal written
+            y = level.row
+            jobs = [(band[:, x * tile_size:(x + 1) * tile_size], os.path.join(output_dir, str(level.zoom), str(x), f"{y}.png"))
+                    for x in range(level.columns)]
+            written += sum(1 for _ in executor.map(_save_tile, jobs))
+            level.row += 1
+            level.filled = 0
+            if level.zoom > 0:
+                lower = levels[level.zoom - 1]
+                lower.push(downsample_2x(band))
+                if lower.filled == tile_size:
+                    emit(lower, lower.band)
+
+        top_level = levels[max_zoom]
+        for y in range(rows):
+            band = tile_array(terrain, left, top + y * tile_size, top_level.columns * tile_size, tile_size, bounds=crop_box)
+            emit(top_level, band)
+            print(f"  Zoom {max_zoom}: row {y + 1}/{rows}", end='\r')
+
+        # Half-filled bands (an odd number of rows above them) are emitted padded with transparency
+        for zoom in range(max_zoom - 1, -1, -1):
+            level = levels[zoom]
+            if level.filled:
+                level.band[level.filled:] = 0
+                emit(level, level.band)
+
+    print(f"\nPyramid: zoom 0-{max_zoom}, {written} tiles of {tile_size}px in '{output_dir}'.")
+    return written
+
+
+def _save_tile(job):
+    pixels, path = job
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(np.ascontiguousarray(pixels), 'RGBA').save(path)
+
+
+def _clear_levels(output_dir):
+    """Remove the {z}/ directories of a previous pyramid; other files in `output_dir` are kept."""
+    if not os.path.isdir(output_dir):
+        return
+    for entry in os.scandir(output_dir):
+        if entry.is_dir(follow_symlinks=False) and entry.name.isdigit():
+            shutil.rmtree(entry.path)
+
+
+def _write_metadata(output_dir, crop_box, tile_size, max_zoom):
+    """pyramid.json: the pixel size of the covered area so a client can limit its bounds."""
+    os.makedirs(output_dir, exist_ok=True)
+    left, top, right, bottom = crop_box
+    metadata = {
+        'tile_size': tile_size,
+        'min_zoom': 0,
+        'max_zoom': max_zoom,
+        'width': right - left,
+        'height': bottom - top,
+        'crop_box': [left, top, right, bottom],
+    }
+    with open(os.path.join(output_dir, METADATA_FILENAME), 'w') as f:
+        json.dump(metadata, f, indent=2)
@@ -0,0 +1,203 @@
+# tools/scripts/tile_catalog.py
+import argparse
+import os
+import re
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+INDEX_FILENAME = 'tile_catalog.npz'
+INDEX_VERSION = 1
+HEADER_PROBE = 4096 # .minimap files wrap the PNG after a short NRBF header
+DEFAULT_WORKERS = 16
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# X-Y-Z.png, X-Y-terrain.png and X-Y-Z.minimap (negative Z written as X-Y--Z)
+TILE_NAME_PATTERN = re.compile(r'^(-?\d+)-(-?\d+)-(-?\d+|terrain)\.(png|minimap)$')
+
+TERRAIN_Z = np.iinfo(np.int32).min # z of X-Y-terrain.png tiles
+
+TILE_DTYPE = np.dtype([
+    ('x', '<i4'), ('y', '<i4'), ('z', '<i4'),
+    ('width', '<i4'), ('height', '<i4'),
+    ('bit_depth', 'u1'), ('color_type', 'u1'),
+    ('size', '<i8'), ('mtime_ns', '<i8'),
+])
+
+
+def read_png_header(data):
+    """(width, height, bit_depth, color_type) from the IHDR chunk of the first PNG in `data`, or None."""
+    start = data.find(PNG_SIGNATURE)
+    ihdr = data[start + 8:start + 8 + 8 + 13] if start != -1 else b''
+    if len(ihdr) < 21 or ihdr[4:8] != b'IHDR':
+        return None
+    width, height, bit_depth, color_type = struct.unpack('>IIBB', ihdr[8:18])
+    return width, height, bit_depth, color_type
+
+
+def parse_tile_name(name):
+    """(x, y, z) of a tile filename (z is TERRAIN_Z for terrain tiles), or None."""
+    match = TILE_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    z = TERRAIN_Z if match.group(3) == 'terrain' else int(match.group(3))
+    return int(match.group(1)), int(match.group(2)), z
+
+
+def _stat(path):
+    """os.stat of one tile, or None if it was deleted since the directory was listed."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _probe(path):
+    """Header read of one tile, or None if it was deleted meanwhile; runs on the worker threads."""
+    try:
+        with open(path, 'rb') as f:
+            return read_png_header(f.read(HEADER_PROBE)) or (0, 0, 0, 0)
+    except FileNotFoundError:
+        return None
+
+
+class TileCatalog:
+    """Tile files of one directory: a structured array (TILE_DTYPE) plus the filenames.
+
+    Rows are sorted by (z, y, x); a width/height of 0 marks a file without a
+    readable PNG header.
+    """
+
+    def __init__(self, directory, names, entries):
+        self.directory = directory
+        self.names = names
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def path(self, index):
+        return os.path.join(self.directory, str(self.names[index]))
+
+    def select(self, extension='.png', terrain=False):
+        """Row indices of map tiles (or terrain tiles) with the given extension."""
+        is_terrain = self.entries['z'] == TERRAIN_Z
+        has_ext = np.char.endswith(self.names, extension)
+        return np.flatnonzero(has_ext & (is_terrain if terrain else ~is_terrain))
+
+    def tile_size(self, indices=None):
+        """Most common (width, height) among the given rows (default: map PNG tiles), or None."""
+        rows = self.entries[self.select() if indices is None else indices]
+        rows = rows[rows['width'] > 0]
+        if len(rows) == 0:
+            return None
+        sizes, counts = np.unique(np.stack([rows['width'], rows['height']], axis=1), axis=0, return_counts=True)
+        width, height = sizes[np.argmax(counts)]
+        return int(width), int(height)
+
+
+def _load_index(index_path):
+    """(names, entries) of a saved index, or None if it is missing or from another version."""
+    try:
+        with np.load(index_path, allow_pickle=False) as npz:
+            if int(npz['version']) != INDEX_VERSION:
+                return None
+            return npz['names'], npz['entries']
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_index(index_path, names, entries):
+    tmp_path = f"{index_path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, version=INDEX_VERSION, names=names, entries=entries)
+    os.replace(tmp_path, index_path)
+
+
+def scan_catalog(directory, previous=None, workers=DEFAULT_WORKERS):
+    """Build the catalog of `directory` with os.scandir and parallel stat/header reads.
+
+    Rows of `previous` (names, entries) whose size and mtime still match are reused
+    without opening the file. Returns (names, entries, number of headers read).
+    """
+    known = {}
+    if previous is not None:
+        for name, row in zip(previous[0].tolist(), previous[1]):
+            known[name] = row
+
+    found = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            coords = parse_tile_name(entry.name)
+            if coords is not None and entry.is_file():
+                found.append((entry.name, coords))
+
+    paths = [os.path.join(directory, name) for name, _ in found]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        stats = list(executor.map(_stat, paths))
+        stale = [i for i, (name, _) in enumerate(found)
+                 if stats[i] is not None and (name not in known or known[name]['size'] != stats[i].st_size
+                                              or known[name]['mtime_ns'] != stats[i].st_mtime_ns)]
+        probed = dict(zip(stale, executor.map(_probe, [paths[i] for i in stale])))
+
+    # Tiles deleted while scanning (no stat or no header read) are left out
+    keep = [i for i in range(len(found)) if stats[i] is not None and probed.get(i, True) is not None]
+    entries = np.zeros(len(keep), dtype=TILE_DTYPE)
+    for row, i in enumerate(keep):
+        name, (x, y, z) = found[i]
+        if i in probed:
+            width, height, bit_depth, color_type = probed[i]
+            entries[row] = (x, y, z, width, height, bit_depth, color_type, stats[i].st_size, stats[i].st_mtime_ns)
+        else:
+            entries[row] = known[name]
+    found = [found[i] for i in keep]
+
+    names = np.array([name for name, _ in found], dtype=str)
+    order = np.lexsort((entries['x'], entries['y'], entries['z']))
+    return names[order], entries[order], len(stale)
+
+
+def load_catalog(directory, refresh=False, workers=DEFAULT_WORKERS):
+    """Return the TileCatalog of `directory`, reusing its saved index.
+
+    Every tile is stat'ed (in parallel); headers are only read for files that are
+    new or whose size or mtime differ from the index (tile_catalog.npz in the
+    directory), and the index is rewritten when anything changed.
+    """
+    index_path = os.path.join(directory, INDEX_FILENAME)
+    previous = None if refresh else _load_index(index_path)
+    names, entries, probed = scan_catalog(directory, previous, workers)
+    if previous is None or probed or len(names) != len(previous[0]):
+        try:
+            _save_index(index_path, names, entries)
+        except OSError as e:
+            print(f"Warning: Could not write tile index {index_path}: {e}")
+    return TileCatalog(directory, names, entries)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Index the tile files (X-Y-Z.png, X-Y-terrain.png, .minimap) of a directory.')
+    parser.add_argument('directory', help='Tile directory.')
+    parser.add_argument('--refresh', action='store_true', help='Ignore the existing index and re-read every header.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Threads for stat and header reads (default: %(default)s).')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        catalog = load_catalog(args.directory, args.refresh, args.workers)
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    entries = catalog.entries
+    terrain = entries['z'] == TERRAIN_Z
+    print(f"{args.directory}: {len(catalog)} tiles ({int(terrain.sum())} terrain) in {elapsed * 1000:.1f} ms")
+    if (~terrain).any():
+        tiles = entries[~terrain]
+        print(f"  X=[{tiles['x'].min()}, {tiles['x'].max()}], Y=[{tiles['y'].min()}, {tiles['y'].max()}], "
+              f"Z=[{tiles['z'].min()}, {tiles['z'].max()}]")
+    sizes, counts = np.unique(np.stack([entries['width'], entries['height']], axis=1), axis=0, return_counts=True)
+    for (width, height), count in zip(sizes.tolist(), counts.tolist()):
+        print(f"  {width}x{height}: {count} tiles" if width else f"  no PNG header: {count} files")